@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter, Request, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
-from services.slack_service import SlackService
+from services.slack_service import SlackService, invalidate_slack_token_cache
 from services.auth_service import get_current_user_profile
 import logging
 import os
@@ -95,6 +95,8 @@ def disconnect(current_user_profile: dict = Depends(get_current_user_profile)):
             user_id=current_user_profile["id"],
             provider=ConnectionProvider.SLACK
         )
+        # Don't keep serving the revoked token from the in-process cache
+        invalidate_slack_token_cache(current_user_profile["id"])
         
         if success:
             return {"message": "Slack disconnected successfully"}
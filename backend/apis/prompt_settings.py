@@ -5,8 +5,6 @@ from services.auth_service import get_current_user_profile
 from services.user_prompt_service import user_prompt_service
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/settings", tags=["prompt-settings"])
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from services.google_service import GoogleService
-from services.slack_service import SlackService
+from services.slack_service import SlackService, invalidate_slack_token_cache
 from services.auth_service import get_current_user_profile
 from services.connections_service import connections_service
 from models import ConnectionProvider
@@ -52,6 +52,8 @@ def disconnect_provider(provider: str, current_user_profile: dict = Depends(get_
         success = connections_service.disconnect_slack_connection(
             user_id=current_user_profile["id"]
         )
+        # Don't keep serving the revoked token from the in-process cache
+        invalidate_slack_token_cache(current_user_profile["id"])
         if success:
             return {
                 "message": f"Successfully disconnected from {provider}",
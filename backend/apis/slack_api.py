@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from services.auth_service import get_current_user_profile
 from services.token_manager import token_manager
+from services.slack_service import SLACK_HTTP_TIMEOUT
 from models import ConnectionProvider
 import logging
 import requests
@@ -31,7 +32,7 @@ def get_slack_user_info(current_user_profile: dict = Depends(get_current_user_pr
         
         # Make API call to Slack
         headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get("https://slack.com/api/auth.test", headers=headers)
+        response = requests.get("https://slack.com/api/auth.test", headers=headers, timeout=SLACK_HTTP_TIMEOUT)
         response.raise_for_status()
         
         slack_data = response.json()
@@ -80,7 +81,7 @@ def get_slack_channels(current_user_profile: dict = Depends(get_current_user_pro
         
         # Make API call to Slack to get channels
         headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get("https://slack.com/api/conversations.list", headers=headers)
+        response = requests.get("https://slack.com/api/conversations.list", headers=headers, timeout=SLACK_HTTP_TIMEOUT)
         response.raise_for_status()
         
         slack_data = response.json()
@@ -12,6 +12,7 @@ Usage:
 import os
 import sys
 import argparse
+import logging
 import time
 from pathlib import Path
 from typing import Optional
@@ -50,6 +51,8 @@ def main():
     
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.INFO)
+    
     print("🚀 Email Categorization Script")
     print("=" * 50)
     
@@ -5,10 +5,14 @@ The models remain the same but operations are performed through the Supabase
 API using ``supabase-py``.
 """
 
+import functools
+import logging
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -19,7 +23,8 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
+@functools.lru_cache(maxsize=1)
 def get_supabase() -> Client:
-    return supabase
+    """Return the process-wide Supabase client, creating it on first use"""
+    logger.info("🔌 Creating Supabase client")
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
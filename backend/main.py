@@ -1,3 +1,8 @@
+from dotenv import load_dotenv
+
+# Load environment variables before any service module reads them
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
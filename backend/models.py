@@ -1,10 +1,14 @@
-from datetime import datetime
+import sys
+from datetime import datetime, timezone
 from typing import Optional, List
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from dataclasses import dataclass
 from enum import Enum
 
+# dataclass(slots=True) needs Python 3.10+; older interpreters fall back to a regular __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 class ConnectionStatus(str, Enum):
     CONNECTED = "connected"
     DISCONNECTED = "disconnected"
@@ -33,7 +37,7 @@ class UserAuthData:
             "user": self.user
         }
 
-@dataclass
+@dataclass(**_SLOTS)
 class EmailDetails:
     """Structured object representing email details from Gmail API"""
     id: str
@@ -45,7 +49,7 @@ class EmailDetails:
     snippet: str
     body: dict  # Contains 'text' and 'html' keys
     labels: List[str]
-    has_attachments: bool
+    has_attachments: Optional[bool]  # None until the body (and its parts) has been loaded
     size_estimate: int
     cc_email: Optional[str] = None
     bcc_email: Optional[str] = None
@@ -93,6 +97,7 @@ class Connection(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     last_sync_at: Optional[datetime] = None
+    last_history_id: Optional[str] = None  # Gmail historyId at the last sync
     metadata: Optional[dict] = None  # Store provider-specific metadata
 
 class OAuthToken(BaseModel):
@@ -106,6 +111,14 @@ class OAuthToken(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+    @field_validator("expires_at")
+    @classmethod
+    def _expires_at_utc(cls, value: datetime) -> datetime:
+        """Normalize expiry to an aware UTC datetime once, at construction"""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
 class Email(BaseModel):
     id: Optional[UUID] = None
     user_id: UUID
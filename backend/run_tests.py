@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
 """Test runner script for Finance Inbox Backend API."""
 
+import os
 import sys
 import subprocess
 import argparse
 from pathlib import Path
 
-def run_command(cmd, description):
+def run_command(cmd, description, env=None):
     """Run a command and print the result."""
     print(f"\n{'='*60}")
     print(f"Running: {description}")
     print(f"Command: {' '.join(cmd)}")
     print(f"{'='*60}")
     
-    result = subprocess.run(cmd, capture_output=False)
+    result = subprocess.run(cmd, capture_output=False, env=env)
     if result.returncode != 0:
         print(f"❌ {description} failed with exit code {result.returncode}")
         return False
@@ -29,6 +30,9 @@ def main():
     parser.add_argument("--specific", "-s", help="Run specific test file or test function")
     parser.add_argument("--markers", "-m", help="Run tests with specific markers")
     parser.add_argument("--install-deps", action="store_true", help="Install test dependencies first")
+    parser.add_argument("--parallel", "-n", action="store_true", help="Spread tests across CPU cores with pytest-xdist")
+    parser.add_argument("--last-failed", "--lf", action="store_true",
+                        help="Rerun only last run's failures (all tests if none) and stop at the first new failure")
     
     args = parser.parse_args()
     
@@ -49,11 +53,24 @@ def main():
     # Build pytest command
     pytest_cmd = [sys.executable, "-m", "pytest"]
     
+    # Skip importing every installed pytest plugin at startup; load only the ones the suite uses
+    pytest_env = {**os.environ, "PYTEST_DISABLE_PLUGIN_AUTOLOAD": "1"}
+    pytest_cmd.extend(["-p", "pytest_asyncio.plugin", "-p", "pytest_mock"])
+    
     # Add coverage if requested
     if args.coverage:
+        pytest_cmd.extend(["-p", "pytest_cov.plugin"])
         pytest_cmd.extend(["--cov=apis", "--cov=services", "--cov=models", 
                           "--cov-report=term-missing", "--cov-report=html:htmlcov"])
     
+    # Distribute test files across workers; session fixtures run once per worker
+    if args.parallel:
+        pytest_cmd.extend(["-p", "xdist.plugin", "-n", "auto", "--dist=loadfile"])
+    
+    # Dev feedback loop: use .pytest_cache to rerun failures only, resuming from the last failing test
+    if args.last_failed:
+        pytest_cmd.extend(["--lf", "--last-failed-no-failures=all", "--sw"])
+    
     # Add verbosity
     if args.verbose:
         pytest_cmd.extend(["-v", "-s"])
@@ -75,7 +92,7 @@ def main():
         pytest_cmd.append("tests/")
     
     # Run tests
-    if not run_command(pytest_cmd, "Running tests"):
+    if not run_command(pytest_cmd, "Running tests", env=pytest_env):
         success = False
     
     # Generate coverage report if coverage was enabled
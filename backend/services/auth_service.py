@@ -11,8 +11,6 @@ from database import get_supabase
 from models import UserAuthData
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Password hashing
@@ -107,10 +105,10 @@ class AuthService:
         """Get user profile from users table"""
         try:
             # The user_id from the token 'sub' claim corresponds to 'supabase_user_id' in our public 'users' table
-            result = self.supabase.table("users").select("*").eq("supabase_user_id", user_id).single().execute()
+            result = self.supabase.table("users").select("*").eq("supabase_user_id", user_id).limit(1).execute()
             
             if result.data:
-                return result.data
+                return result.data[0]
             else:
                 logger.warning(f"No user profile found for user_id: {user_id}")
                 return None
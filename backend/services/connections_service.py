@@ -76,16 +76,20 @@ class ConnectionsService:
     def update_last_sync(
         self, 
         user_id: str, 
-        provider: ConnectionProvider
+        provider: ConnectionProvider,
+        history_id: Optional[str] = None
     ) -> bool:
-        """Update last sync timestamp"""
+        """Update last sync timestamp and, if provided, the provider's sync cursor"""
         try:
             logger.info(f"📅 Updating last sync time for {provider.value} connection")
             
+            now_iso = datetime.now(timezone.utc).isoformat()
             update_data = {
-                "last_sync_at": datetime.now(timezone.utc).isoformat(),
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "last_sync_at": now_iso,
+                "updated_at": now_iso
             }
+            if history_id:
+                update_data["last_history_id"] = history_id
             
             result = self.supabase.table("connections").update(update_data).eq(
                 "user_id", user_id
@@ -7,8 +7,6 @@ from datetime import datetime, timezone
 from openai import OpenAI
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EmailCategorizationService:
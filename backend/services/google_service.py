@@ -2,24 +2,55 @@ import os
 import logging
 import re
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Tuple, Union
 from uuid import UUID
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from dotenv import load_dotenv
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 from database import get_supabase
 from models import OAuthToken, EmailDetails, ConnectionProvider
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# Number of concurrent Gmail API requests when fetching message details
+MESSAGE_FETCH_WORKERS = 16
+# Retries (with exponential backoff) per message request; the Gmail client retries
+# 429s, 5xx and rateLimitExceeded 403s, which this concurrency can trigger
+MESSAGE_FETCH_RETRIES = 3
+
+# Emails are re-categorized once their body is loaded; the LLM calls run here so
+# opening an email never waits on them
+_RECATEGORIZE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="recategorize")
+
+# Partial-response masks limiting Gmail API payloads to the fields we actually read.
+# Sync only pulls headers; bodies are fetched on demand when an email is opened.
+MESSAGE_FIELDS = 'id,threadId,labelIds,snippet,sizeEstimate,internalDate,payload(headers,mimeType)'
+MESSAGE_BODY_FIELDS = 'id,payload(mimeType,filename,body,parts(mimeType,filename,body,parts))'
+MESSAGE_LIST_FIELDS = 'messages/id,nextPageToken'
+MESSAGE_METADATA_HEADERS = ['From', 'To', 'Cc', 'Subject', 'Date', 'Message-ID', 'References', 'In-Reply-To']
+
+# Labels of history entries that incremental sync ignores (messages.list leaves these out too)
+_SKIPPED_HISTORY_LABELS = frozenset({'SPAM', 'TRASH', 'DRAFT'})
+
+# Email columns read for list views and for full email views (which add bodies and recipients)
+EMAIL_INBOX_COLUMNS = (
+    "id, gmail_id, thread_id, subject, from_email, to_email, date_sent, snippet, "
+    "labels, has_attachments, size_estimate, is_processed, created_at, "
+    "category, category_confidence, categorized_at, category_prompt_version, is_read"
+)
+EMAIL_FULL_COLUMNS = EMAIL_INBOX_COLUMNS + ", cc_email, bcc_email, reply_to, body_text, body_html"
+
+# Address patterns: bare "<email>" and full "Name <email>" headers
+_ANGLE_ADDR_RE = re.compile(r'<([^>]+)>')
+_NAME_ADDR_RE = re.compile(r'^\s*"?([^"<]*?)"?\s*<([^>]+)>\s*$')
 
 class GoogleService:
     def __init__(self, internal_user_id: Optional[Union[str, UUID]] = None):
@@ -34,7 +65,18 @@ class GoogleService:
             "https://www.googleapis.com/auth/userinfo.email",
             "https://www.googleapis.com/auth/userinfo.profile"
         ]
+        # OAuth client config shared by the authorization URL and callback flows
+        self._client_config = {
+            "web": {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+            }
+        }
         self.supabase = get_supabase()
+        # Authenticated Gmail service (and the account's address) cached until the access token rotates
+        self._reset_service_cache()
         
         # Log initialization
         if self.internal_user_id:
@@ -42,14 +84,24 @@ class GoogleService:
         else:
             logger.warning("⚠️ GoogleService initialized without internal_user_id")
 
+    def _reset_service_cache(self) -> None:
+        """Forget the cached Gmail service, its credentials and the account's email address"""
+        self._service = None
+        self._service_token = None
+        self._credentials = None
+        self._user_email = None
+
     def _ensure_utc(self, dt: datetime) -> datetime:
         """Ensure a datetime is in UTC timezone"""
-        if dt.tzinfo is None:
+        tz = dt.tzinfo
+        if tz is None:
             # Naive datetime, assume it's UTC
             return dt.replace(tzinfo=timezone.utc)
-        else:
-            # Convert to UTC if it's in a different timezone
-            return dt.astimezone(timezone.utc)
+        if tz is timezone.utc:
+            # Already UTC (the common case), skip the conversion
+            return dt
+        # Convert to UTC if it's in a different timezone
+        return dt.astimezone(timezone.utc)
 
     def _extract_email_details(self, msg_data: dict) -> EmailDetails:
         """Extract detailed information from Gmail message data"""
@@ -72,8 +124,11 @@ class GoogleService:
         to_email = headers.get('to', 'Unknown Recipient')
         date = headers.get('date', '')
         
-        # Get email body
-        body_text = self._extract_body(payload)
+        # Get email body (metadata-only payloads leave it unset until the email is opened)
+        if 'body' in payload or 'parts' in payload:
+            body_text = self._extract_body(payload)
+        else:
+            body_text = {'text': None, 'html': None}
         
         # Check if email has attachments
         has_attachments = self._has_attachments(payload)
@@ -149,8 +204,8 @@ class GoogleService:
         
         return body
 
-    def _has_attachments(self, payload: dict) -> bool:
-        """Check if email has attachments"""
+    def _has_attachments(self, payload: dict) -> Optional[bool]:
+        """Check if email has attachments, or None if the payload carries no parts to check"""
         def check_parts(part):
             # Check if this part is an attachment
             if part.get('filename') and part.get('body', {}).get('attachmentId'):
@@ -163,10 +218,14 @@ class GoogleService:
                         return True
             return False
         
-        if 'parts' in payload:
-            for part in payload['parts']:
-                if check_parts(part):
-                    return True
+        if 'parts' not in payload:
+            # Metadata-only payloads carry no parts, so it isn't known until the body is loaded;
+            # a single-part message with a body can't have attachments
+            return False if 'body' in payload else None
+        
+        for part in payload['parts']:
+            if check_parts(part):
+                return True
         
         return False
 
@@ -179,26 +238,22 @@ class GoogleService:
             return None
             
         try:
-            # First, get the Gmail connection for this user
-            logger.debug(f"📊 Looking up Gmail connection for user_id: {self.internal_user_id}")
-            connection_result = self.supabase.table("connections").select("oauth_token_id").eq("user_id", str(self.internal_user_id)).eq("connection_provider", "gmail").single().execute()
+            # Get the Gmail connection together with its OAuth token in one request
+            logger.debug(f"📊 Looking up Gmail connection and token for user_id: {self.internal_user_id}")
+            result = self.supabase.table("connections").select("oauth_token_id, oauth_tokens(id, provider, access_token, refresh_token, token_type, expires_at, scope)").eq("user_id", str(self.internal_user_id)).eq("connection_provider", "gmail").limit(1).execute()
+            connection = result.data[0] if result.data else None
             
-            if not connection_result.data or not connection_result.data.get('oauth_token_id'):
+            if not connection or not connection.get('oauth_token_id'):
                 logger.info(f"🔍 No Gmail connection or oauth_token_id found for user {self.internal_user_id}")
                 return None
             
-            oauth_token_id = connection_result.data['oauth_token_id']
-            logger.debug(f"📊 Found oauth_token_id: {oauth_token_id}, retrieving token details")
-            
-            # Now get the OAuth token using the ID from connection
-            token_result = self.supabase.table("oauth_tokens").select("*").eq("id", oauth_token_id).eq("provider", "google").single().execute()
-            
-            if token_result.data:
-                token = OAuthToken(**token_result.data)
+            token_data = connection.get('oauth_tokens')
+            if token_data and token_data.get('provider') == "google":
+                token = OAuthToken(**token_data)
                 logger.info(f"✅ Found tokens for user {self.internal_user_id}, expires at: {token.expires_at}")
                 return token
             else:
-                logger.info(f"🔍 No OAuth token found with ID {oauth_token_id}")
+                logger.info(f"🔍 No OAuth token found with ID {connection['oauth_token_id']}")
                 return None
                 
         except Exception as e:
@@ -228,12 +283,12 @@ class GoogleService:
             logger.debug(f"📅 Storing expiry time in UTC: {expires_at_utc.isoformat()}")
             logger.debug(f"📝 Token data prepared: provider=google, expires_at={expires_at_utc.isoformat()}")
             
-            # Check if we have an existing connection with oauth_token_id
-            existing_token = self._get_tokens_from_db()
-            if existing_token:
+            # Look up the connection's existing oauth_token_id in one query
+            connection_result = self.supabase.table("connections").select("oauth_token_id").eq("user_id", str(self.internal_user_id)).eq("connection_provider", "gmail").limit(1).execute()
+            oauth_token_id = connection_result.data[0].get('oauth_token_id') if connection_result.data else None
+            if oauth_token_id:
                 logger.info(f"🔄 Updating existing tokens for user {self.internal_user_id}")
-                result = self.supabase.table("oauth_tokens").update(token_data).eq("id", str(existing_token.id)).execute()
-                oauth_token_id = str(existing_token.id)
+                result = self.supabase.table("oauth_tokens").upsert({**token_data, "id": oauth_token_id}, on_conflict="id").execute()
             else:
                 logger.info(f"➕ Inserting new tokens for user {self.internal_user_id}")
                 result = self.supabase.table("oauth_tokens").insert(token_data).execute()
@@ -317,8 +372,8 @@ class GoogleService:
             logger.error(f"❌ Error creating Gmail connection: {str(e)}")
             return False
 
-    def _update_last_sync(self) -> bool:
-        """Update last sync timestamp for Gmail connection"""
+    def _update_last_sync(self, history_id: Optional[str] = None) -> bool:
+        """Update last sync timestamp (and Gmail historyId) for Gmail connection"""
         if not self.internal_user_id:
             return False
         
@@ -328,80 +383,93 @@ class GoogleService:
             
             return connections_service.update_last_sync(
                 user_id=str(self.internal_user_id),
-                provider=ConnectionProvider.GMAIL
+                provider=ConnectionProvider.GMAIL,
+                history_id=history_id
             )
         except Exception as e:
             logger.error(f"❌ Error updating last sync: {str(e)}")
             return False
 
-    def _save_email_to_db(self, email_data: EmailDetails) -> bool:
-        """Save email to database with categorization"""
+    def _build_email_row(self, email_data: EmailDetails) -> dict:
+        """Build the database row for an email, including categorization"""
+        # Parse date_sent if it exists
+        date_sent = None
+        if email_data.date:
+            try:
+                from email.utils import parsedate_to_datetime
+                date_sent = parsedate_to_datetime(email_data.date)
+                # Ensure timezone-aware
+                if date_sent.tzinfo is None:
+                    date_sent = date_sent.replace(tzinfo=timezone.utc)
+                else:
+                    date_sent = date_sent.astimezone(timezone.utc)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to parse email date '{email_data.date}': {str(e)}")
+        
+        # Prepare email data for database
+        db_email_data = {
+            "user_id": str(self.internal_user_id),
+            "gmail_id": email_data.id,
+            "thread_id": email_data.thread_id,
+            "subject": email_data.subject,
+            "from_email": email_data.from_email,
+            "to_email": email_data.to_email,
+            "date_sent": date_sent.isoformat() if date_sent else None,
+            "snippet": email_data.snippet,
+            "body_text": email_data.body.get('text'),
+            "body_html": email_data.body.get('html'),
+            "labels": email_data.labels,
+            "has_attachments": email_data.has_attachments,
+            "size_estimate": email_data.size_estimate,
+            "is_read": False  # New emails are always unread
+        }
+        
+        # Add CC and BCC fields if available (for sent emails)
+        if email_data.cc_email:
+            db_email_data['cc_email'] = email_data.cc_email
+        if email_data.bcc_email:
+            db_email_data['bcc_email'] = email_data.bcc_email
+        
+        # Add email categorization using LLM
+        db_email_data.update(self._categorize_email_row(db_email_data))
+        
+        # Remove None values to avoid database issues
+        return {k: v for k, v in db_email_data.items() if v is not None}
+
+    def _categorize_email_row(self, db_email_data: dict) -> dict:
+        """Categorize an email row using LLM, returning the category columns to store"""
+        try:
+            from services.email_categorization_service import get_email_categorization_service
+            categorization_service = get_email_categorization_service()
+            categorization_result = categorization_service.categorize_email_with_metadata(db_email_data, str(self.internal_user_id))
+            
+            if categorization_result['category']:
+                logger.info(f"✅ Email categorized as: {categorization_result['category']} (confidence: {categorization_result['category_confidence']})")
+                return {
+                    'category': categorization_result['category'],
+                    'category_confidence': categorization_result['category_confidence'],
+                    'categorized_at': categorization_result['categorized_at'].isoformat(),
+                    'category_prompt_version': categorization_result['category_prompt_version']
+                }
+            logger.warning("⚠️ Email categorization failed - no category returned")
+                
+        except Exception as e:
+            logger.error(f"❌ Email categorization failed: {str(e)}")
+            # Continue saving email even if categorization fails
+        return {}
+
+    def _save_email_to_db(self, email_data: Union[EmailDetails, List[EmailDetails]]) -> bool:
+        """Save one email (or a list of emails) to database with categorization"""
         if not self.internal_user_id:
             logger.warning("❌ No internal_user_id available, cannot save email")
             return False
         
+        if isinstance(email_data, list):
+            rows = [self._build_email_row(details) for details in email_data]
+            return self._bulk_save_emails_to_db(rows) > 0
+        
         try:
-            # Parse date_sent if it exists
-            date_sent = None
-            if email_data.date:
-                try:
-                    from email.utils import parsedate_to_datetime
-                    date_sent = parsedate_to_datetime(email_data.date)
-                    # Ensure timezone-aware
-                    if date_sent.tzinfo is None:
-                        date_sent = date_sent.replace(tzinfo=timezone.utc)
-                    else:
-                        date_sent = date_sent.astimezone(timezone.utc)
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to parse email date '{email_data.date}': {str(e)}")
-            
-            # Prepare email data for database
-            db_email_data = {
-                "user_id": str(self.internal_user_id),
-                "gmail_id": email_data.id,
-                "thread_id": email_data.thread_id,
-                "subject": email_data.subject,
-                "from_email": email_data.from_email,
-                "to_email": email_data.to_email,
-                "date_sent": date_sent.isoformat() if date_sent else None,
-                "snippet": email_data.snippet,
-                "body_text": email_data.body.get('text'),
-                "body_html": email_data.body.get('html'),
-                "labels": email_data.labels,
-                "has_attachments": email_data.has_attachments,
-                "size_estimate": email_data.size_estimate,
-                "is_read": False  # New emails are always unread
-            }
-            
-            # Add CC and BCC fields if available (for sent emails)
-            if email_data.cc_email:
-                db_email_data['cc_email'] = email_data.cc_email
-            if email_data.bcc_email:
-                db_email_data['bcc_email'] = email_data.bcc_email
-            
-            # Add email categorization using LLM
-            try:
-                from services.email_categorization_service import get_email_categorization_service
-                categorization_service = get_email_categorization_service()
-                categorization_result = categorization_service.categorize_email_with_metadata(db_email_data, str(self.internal_user_id))
-                
-                # Add categorization fields to database data
-                if categorization_result['category']:
-                    db_email_data['category'] = categorization_result['category']
-                    db_email_data['category_confidence'] = categorization_result['category_confidence']
-                    db_email_data['categorized_at'] = categorization_result['categorized_at'].isoformat()
-                    db_email_data['category_prompt_version'] = categorization_result['category_prompt_version']
-                    
-                    logger.info(f"✅ Email categorized as: {categorization_result['category']} (confidence: {categorization_result['category_confidence']})")
-                else:
-                    logger.warning("⚠️ Email categorization failed - no category returned")
-                    
-            except Exception as e:
-                logger.error(f"❌ Email categorization failed: {str(e)}")
-                # Continue saving email even if categorization fails
-            
-            # Remove None values to avoid database issues
-            db_email_data = {k: v for k, v in db_email_data.items() if v is not None}
+            db_email_data = self._build_email_row(email_data)
             
             logger.debug(f"💾 Saving email to database: {email_data.subject[:50]}...")
             
@@ -422,6 +490,40 @@ class GoogleService:
             logger.error(f"❌ Error saving email {email_data.id} to database: {str(e)}")
             return False
 
+    def _bulk_save_emails_to_db(self, rows: List[dict]) -> int:
+        """Upsert prepared email rows in as few requests as possible, returning the number saved"""
+        if not self.internal_user_id or not rows:
+            return 0
+        
+        # PostgREST bulk upserts require every row to carry the same columns. Padding
+        # missing keys with NULL would overwrite existing values (e.g. a previous
+        # category) on conflict, so upsert each distinct column set separately
+        groups: Dict[frozenset, List[dict]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        
+        saved_count = 0
+        for group in groups.values():
+            try:
+                logger.debug(f"💾 Saving {len(group)} emails to database")
+                
+                result = self.supabase.table("emails").upsert(
+                    group,
+                    on_conflict="user_id,gmail_id"  # Handle duplicates
+                ).execute()
+                
+                if result.data:
+                    saved_count += len(result.data)
+                else:
+                    logger.warning(f"⚠️ No data returned when saving {len(group)} emails")
+                    
+            except Exception as e:
+                logger.error(f"❌ Error saving {len(group)} emails to database: {str(e)}")
+        
+        if saved_count:
+            logger.info(f"✅ Successfully saved {saved_count} emails to database")
+        return saved_count
+
     def _get_emails_from_db(self, limit: int = 10) -> List[dict]:
         """Retrieve emails from database for the current user"""
         if not self.internal_user_id:
@@ -444,6 +546,67 @@ class GoogleService:
             logger.error(f"❌ Error retrieving emails from database for user {self.internal_user_id}: {str(e)}")
             return []
 
+    def _get_last_history_id(self) -> Optional[str]:
+        """Get the Gmail historyId recorded at the end of the last sync"""
+        if not self.internal_user_id:
+            return None
+        
+        try:
+            result = self.supabase.table("connections").select("last_history_id").eq("user_id", str(self.internal_user_id)).eq("connection_provider", "gmail").limit(1).execute()
+            
+            if result.data:
+                return result.data[0].get('last_history_id')
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error getting last history id: {str(e)}")
+            return None
+
+    def _list_message_ids_since(self, service, start_history_id: str, max_results: int):
+        """List ids of messages added since start_history_id using the Gmail history API
+        
+        Spam, trash and draft messages are skipped, matching messages.list, and at
+        most the max_results most recent ids are returned.
+        
+        Returns:
+            Tuple of (message_ids, latest_history_id), or (None, None) if the
+            history is no longer available and a full sync is required
+        """
+        message_ids = []
+        seen_ids = set()
+        page_token = None
+        
+        try:
+            while True:
+                response = service.users().history().list(
+                    userId='me',
+                    startHistoryId=start_history_id,
+                    historyTypes=['messageAdded'],
+                    pageToken=page_token,
+                    fields='history/messagesAdded/message(id,labelIds),historyId,nextPageToken'
+                ).execute()
+                
+                for record in response.get('history', []):
+                    for added in record.get('messagesAdded', []):
+                        message = added['message']
+                        message_id = message['id']
+                        if _SKIPPED_HISTORY_LABELS.intersection(message.get('labelIds', [])):
+                            continue
+                        if message_id not in seen_ids:
+                            seen_ids.add(message_id)
+                            message_ids.append(message_id)
+                
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    # History is oldest first; keep the newest ids, as messages.list would
+                    return message_ids[-max_results:][::-1], response.get('historyId')
+                    
+        except HttpError as e:
+            # Gmail only keeps history for a limited time; an expired id returns 404
+            if e.resp.status == 404:
+                logger.warning(f"⚠️ History {start_history_id} no longer available, falling back to full sync")
+                return None, None
+            raise
+
     def _get_most_recent_email_date(self) -> Optional[datetime]:
         """Get the date of the most recent email in the database"""
         if not self.internal_user_id:
@@ -461,17 +624,17 @@ class GoogleService:
             logger.error(f"❌ Error getting most recent email date: {str(e)}")
             return None
 
-    def _email_exists_in_db(self, gmail_id: str) -> bool:
-        """Check if an email already exists in the database"""
-        if not self.internal_user_id:
-            return False
+    def _email_ids_in_db(self, gmail_ids: List[str]) -> set:
+        """Return the subset of gmail_ids that already exist in the database (single query)"""
+        if not self.internal_user_id or not gmail_ids:
+            return set()
         
         try:
-            result = self.supabase.table("emails").select("id").eq("user_id", str(self.internal_user_id)).eq("gmail_id", gmail_id).execute()
-            return bool(result.data)
+            result = self.supabase.table("emails").select("gmail_id").eq("user_id", str(self.internal_user_id)).in_("gmail_id", gmail_ids).execute()
+            return {row['gmail_id'] for row in result.data} if result.data else set()
         except Exception as e:
-            logger.error(f"❌ Error checking if email exists: {str(e)}")
-            return False
+            logger.error(f"❌ Error checking which emails exist: {str(e)}")
+            return set()
 
     def mark_email_as_read(self, email_id: str) -> bool:
         """Mark a single email as read"""
@@ -507,11 +670,7 @@ class GoogleService:
             logger.info(f"📥 Retrieving inbox for user {self.internal_user_id} (limit: {limit}, offset: {offset})")
             
             # Query emails with pagination, ordered by date (newest first)
-            result = self.supabase.table("emails").select(
-                "id, gmail_id, subject, from_email, to_email, date_sent, snippet, "
-                "labels, has_attachments, size_estimate, is_processed, created_at, "
-                "category, category_confidence, categorized_at, category_prompt_version, is_read"
-            ).eq("user_id", str(self.internal_user_id)).order("date_sent", desc=True).range(offset, offset + limit - 1).execute()
+            result = self.supabase.table("emails").select(EMAIL_INBOX_COLUMNS).eq("user_id", str(self.internal_user_id)).order("date_sent", desc=True).range(offset, offset + limit - 1).execute()
             
             if result.data:
                 # Format emails for inbox display
@@ -540,11 +699,7 @@ class GoogleService:
             logger.info(f"🧵 Retrieving inbox threads for user {self.internal_user_id} (limit: {limit}, offset: {offset})")
             
             # Get all emails for the user, including thread_id
-            result = self.supabase.table("emails").select(
-                "id, gmail_id, subject, from_email, to_email, date_sent, snippet, "
-                "labels, has_attachments, size_estimate, is_processed, created_at, thread_id, "
-                "category, category_confidence, categorized_at, category_prompt_version, is_read"
-            ).eq("user_id", str(self.internal_user_id)).order("date_sent", desc=True).execute()
+            result = self.supabase.table("emails").select(EMAIL_INBOX_COLUMNS).eq("user_id", str(self.internal_user_id)).order("date_sent", desc=True).execute()
             
             if not result.data:
                 logger.info(f"📭 No emails found for user {self.internal_user_id}")
@@ -624,17 +779,15 @@ class GoogleService:
             logger.info(f"🧵 Retrieving thread {thread_id} for user {self.internal_user_id}")
             
             # Get all emails in the thread
-            result = self.supabase.table("emails").select("*").eq("user_id", str(self.internal_user_id)).eq("thread_id", thread_id).order("date_sent", desc=False).execute()
+            result = self.supabase.table("emails").select(EMAIL_FULL_COLUMNS).eq("user_id", str(self.internal_user_id)).eq("thread_id", thread_id).order("date_sent", desc=False).execute()
             
             if not result.data:
                 logger.info(f"📭 No emails found in thread {thread_id}")
                 return None
             
             # Format all emails in the thread
-            formatted_emails = []
-            for email in result.data:
-                formatted_email = self._format_full_email(email)
-                formatted_emails.append(formatted_email)
+            # Load any missing bodies for the whole thread in one batch
+            formatted_emails = [self._format_full_email(email) for email in self._fetch_bodies_if_missing(result.data)]
             
             # Get thread metadata from the latest email
             latest_email = max(formatted_emails, key=lambda x: x.get('date_sent') or '1970-01-01T00:00:00Z')
@@ -667,39 +820,35 @@ class GoogleService:
             logger.error(f"❌ Error retrieving thread {thread_id}: {str(e)}")
             return None
 
-    def _format_inbox_email(self, email: dict) -> dict:
-        """Format email for inbox display"""
+    def _build_email_dict(self, email: dict, include_body: bool) -> dict:
+        """Format an email row in a single pass, optionally including body and recipients"""
         # Parse date for better display
         date_sent = email.get('date_sent')
         formatted_date = None
         if date_sent:
             try:
-                from datetime import datetime
-                if isinstance(date_sent, str):
-                    parsed_date = datetime.fromisoformat(date_sent.replace('Z', '+00:00'))
-                    formatted_date = parsed_date.strftime('%Y-%m-%d %H:%M')
+                if isinstance(date_sent, datetime):
+                    parsed_date = date_sent
                 else:
-                    formatted_date = date_sent.strftime('%Y-%m-%d %H:%M')
+                    parsed_date = datetime.fromisoformat(date_sent[:-1] + '+00:00' if date_sent.endswith('Z') else date_sent)
+                formatted_date = parsed_date.strftime('%Y-%m-%d %H:%M')
             except Exception as e:
                 logger.warning(f"⚠️ Failed to format date {date_sent}: {str(e)}")
                 formatted_date = str(date_sent) if date_sent else None
 
-        # Extract sender name from email address
-        from_email = email.get('from_email', '')
-        sender_name = from_email
-        if '<' in from_email and '>' in from_email:
-            # Extract name from "Name <email@domain.com>" format
-            sender_name = from_email.split('<')[0].strip().strip('"')
-            if not sender_name:
-                sender_name = from_email.split('<')[1].split('>')[0]
+        # Extract name from "Name <email@domain.com>" format, falling back to the address
+        from_email = email.get('from_email') or ''
+        match = _NAME_ADDR_RE.match(from_email)
+        sender_name = (match.group(1) or match.group(2)) if match else from_email
+        
+        # Truncate long snippets for the list view
+        full_snippet = email.get('snippet') or ''
+        snippet = full_snippet[:147] + '...' if len(full_snippet) > 150 else full_snippet
         
         # Determine email status
         labels = email.get('labels', [])
-        is_unread = not email.get('is_read', False)
-        is_important = 'IMPORTANT' in labels
-        is_starred = 'STARRED' in labels
         
-        return {
+        formatted_email = {
             'id': email.get('id'),
             'gmail_id': email.get('gmail_id'),
             'subject': email.get('subject') or '(No Subject)',
@@ -707,13 +856,13 @@ class GoogleService:
             'from_email': from_email,
             'date': formatted_date,
             'date_sent': date_sent,
-            'snippet': email.get('snippet', '')[:150] + '...' if email.get('snippet', '') else '',
+            'snippet': snippet,
             'labels': labels,
             'has_attachments': email.get('has_attachments', False),
             'size_estimate': email.get('size_estimate'),
-            'is_unread': is_unread,
-            'is_important': is_important,
-            'is_starred': is_starred,
+            'is_unread': not email.get('is_read', False),
+            'is_important': 'IMPORTANT' in labels,
+            'is_starred': 'STARRED' in labels,
             'is_processed': email.get('is_processed', False),
             'created_at': email.get('created_at'),
             # Email categorization fields
@@ -722,45 +871,34 @@ class GoogleService:
             'categorized_at': email.get('categorized_at'),
             'category_prompt_version': email.get('category_prompt_version')
         }
-
-    def _format_full_email(self, email: dict) -> dict:
-        """Format email for full display including body content"""
-        # Start with inbox formatting
-        formatted_email = self._format_inbox_email(email)
-        
-        # Add body content for full email view
-        body_text = email.get('body_text', '')
-        body_html = email.get('body_html', '')
-        
-        # Format body object to match frontend expectations
-        formatted_email['body'] = {
-            'text': body_text,
-            'html': body_html
-        }
         
-        # Add additional fields for full email view
-        formatted_email.update({
-            'to_email': email.get('to_email'),
-            'cc_email': email.get('cc_email'),
-            'bcc_email': email.get('bcc_email'),
-            'reply_to': email.get('reply_to'),
-            'thread_id': email.get('thread_id'),
-            'full_snippet': email.get('snippet', ''),  # Full snippet without truncation
-        })
+        if include_body:
+            # Body object matches frontend expectations
+            formatted_email['body'] = {
+                'text': email.get('body_text', ''),
+                'html': email.get('body_html', '')
+            }
+            formatted_email['to_email'] = email.get('to_email')
+            formatted_email['cc_email'] = email.get('cc_email')
+            formatted_email['bcc_email'] = email.get('bcc_email')
+            formatted_email['reply_to'] = email.get('reply_to')
+            formatted_email['thread_id'] = email.get('thread_id')
+            formatted_email['full_snippet'] = full_snippet  # Full snippet without truncation
         
         return formatted_email
 
+    def _format_inbox_email(self, email: dict) -> dict:
+        """Format email for inbox display"""
+        return self._build_email_dict(email, include_body=False)
+
+    def _format_full_email(self, email: dict) -> dict:
+        """Format email for full display including body content"""
+        return self._build_email_dict(email, include_body=True)
+
     def get_authorization_url(self, state: str = None) -> str:
         """Generate Google OAuth authorization URL"""
         flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                }
-            },
+            self._client_config,
             scopes=self.scopes,
             redirect_uri=self.redirect_uri,
         )
@@ -789,14 +927,7 @@ class GoogleService:
 
         logger.debug("🔑 Creating OAuth flow for token exchange")
         flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                }
-            },
+            self._client_config,
             scopes=self.scopes,
             redirect_uri=self.redirect_uri,
         )
@@ -844,8 +975,9 @@ class GoogleService:
         """Fetch Gmail emails using stored credentials
         
         Args:
-            max_results: Maximum number of emails to fetch
-            only_new: If True, only fetch emails that don't exist in database
+            max_results: Maximum number of emails to fetch when listing the mailbox
+            only_new: If True, only fetch emails that don't exist in database, using the
+                Gmail history API from the last recorded historyId when available
         """
         logger.info(f"📧 Starting Gmail email fetch for user {self.internal_user_id} (only_new={only_new})")
         
@@ -856,55 +988,75 @@ class GoogleService:
             return []
 
         try:
-            # Build query for Gmail API
-            query = ""
-            if only_new:
-                # Get the most recent email date from database
-                last_email = self._get_most_recent_email_date()
-                if last_email:
-                    # Format date for Gmail API query
-                    query = f"after:{last_email.strftime('%Y/%m/%d')}"
-                    logger.info(f"🔍 Fetching emails newer than {last_email}")
-            
-            # Fetch messages
-            logger.info(f"🌐 Fetching messages from Gmail API (max {max_results})")
-            result = service.users().messages().list(
-                userId='me', 
-                maxResults=max_results,
-                q=query if query else None
-            ).execute()
-            
-            messages = result.get('messages', [])
-            logger.info(f"📨 Found {len(messages)} messages")
+            message_ids = None
+            history_id = None
             
-            emails = []
-            new_emails_count = 0
-            
-            for i, msg in enumerate(messages):
-                # Check if email already exists in database
-                if only_new and self._email_exists_in_db(msg['id']):
-                    logger.debug(f"⏭️ Skipping existing email: {msg['id']}")
-                    continue
+            if only_new:
+                # Incremental sync: ask Gmail only for messages added since the last sync
+                last_history_id = self._get_last_history_id()
+                if last_history_id:
+                    logger.info(f"🔍 Fetching messages added since history {last_history_id}")
+                    message_ids, history_id = self._list_message_ids_since(service, last_history_id, max_results)
+            
+            if message_ids is None:
+                # Record the mailbox position before listing so nothing arriving mid-sync is missed
+                profile = service.users().getProfile(userId='me', fields='historyId').execute()
+                history_id = profile.get('historyId')
                 
-                logger.debug(f"📧 Fetching details for message {i+1}/{len(messages)}: {msg['id']}")
-                msg_data = service.users().messages().get(
+                # Build query for Gmail API
+                query = ""
+                if only_new:
+                    # Get the most recent email date from database
+                    last_email = self._get_most_recent_email_date()
+                    if last_email:
+                        # Format date for Gmail API query
+                        query = f"after:{last_email.strftime('%Y/%m/%d')}"
+                        logger.info(f"🔍 Fetching emails newer than {last_email}")
+                
+                # Fetch messages
+                logger.info(f"🌐 Fetching messages from Gmail API (max {max_results})")
+                result = service.users().messages().list(
                     userId='me', 
-                    id=msg['id'],
-                    format='full'  # Get full message details including body
+                    maxResults=max_results,
+                    q=query if query else None,
+                    fields=MESSAGE_LIST_FIELDS
                 ).execute()
                 
+                message_ids = [msg['id'] for msg in result.get('messages', [])]
+            
+            logger.info(f"📨 Found {len(message_ids)} messages")
+            
+            # Skip emails that already exist in database (e.g. replies we stored on send),
+            # looked up in one round trip
+            existing_ids = self._email_ids_in_db(message_ids) if only_new else set()
+            new_message_ids = [message_id for message_id in message_ids if message_id not in existing_ids]
+            if len(new_message_ids) < len(message_ids):
+                logger.debug(f"⏭️ Skipping {len(message_ids) - len(new_message_ids)} existing emails")
+            
+            emails = []
+            rows = []
+            
+            messages, failed_ids = self._fetch_messages(service, new_message_ids)
+            for msg_data in messages:
                 # Extract email details
                 email_details = self._extract_email_details(msg_data)
                 emails.append(email_details.to_dict())  # Convert to dict for API compatibility
-                
-                # Save email to database
-                if self._save_email_to_db(email_details):
-                    new_emails_count += 1
+                rows.append(self._build_email_row(email_details))
+            
+            # Save all fetched emails to database in one request
+            new_emails_count = self._bulk_save_emails_to_db(rows)
             
             logger.info(f"✅ Successfully fetched and saved {new_emails_count} new emails for user {self.internal_user_id}")
             
-            # Update last sync time
-            self._update_last_sync()
+            # Update last sync time, only advancing the history cursor if every message was
+            # fetched and the save went through; the next sync retries the rest, skipping
+            # the emails saved here
+            if failed_ids:
+                logger.warning(f"⚠️ {len(failed_ids)} messages failed to fetch, keeping the history cursor")
+                history_id = None
+            elif rows and not new_emails_count:
+                history_id = None
+            self._update_last_sync(history_id=history_id)
             
             return emails
             
@@ -912,6 +1064,59 @@ class GoogleService:
             logger.error(f"❌ Error fetching emails for user {self.internal_user_id}: {str(e)}")
             return []
 
+    def _fetch_messages(self, service, message_ids: List[str], full: bool = False) -> Tuple[List[dict], List[str]]:
+        """Fetch message metadata (or full bodies) concurrently, preserving the order of message_ids
+        
+        Returns:
+            Tuple of (messages, failed_ids); a message that still fails after retries is
+            reported in failed_ids rather than aborting the rest of the batch
+        """
+        if not message_ids:
+            return [], []
+        
+        failed_ids = []
+        
+        # httplib2.Http is not thread-safe, so each worker gets its own authorized transport
+        thread_state = threading.local()
+        
+        def fetch_message(message_id: str) -> Optional[dict]:
+            http = getattr(thread_state, 'http', None)
+            if http is None:
+                http = thread_state.http = AuthorizedHttp(self._credentials, http=httplib2.Http())
+            logger.debug(f"📧 Fetching details for message {message_id}")
+            try:
+                if full:
+                    request = service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        format='full',
+                        fields=MESSAGE_BODY_FIELDS
+                    )
+                else:
+                    request = service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        format='metadata',  # Headers only; bodies are loaded lazily
+                        metadataHeaders=MESSAGE_METADATA_HEADERS,
+                        fields=MESSAGE_FIELDS
+                    )
+                return request.execute(http=http, num_retries=MESSAGE_FETCH_RETRIES)
+            except HttpError as e:
+                # Messages reported by history.list may have been deleted since
+                if e.resp.status == 404:
+                    logger.debug(f"⏭️ Message {message_id} no longer exists")
+                    return None
+                logger.error(f"❌ Error fetching message {message_id}: {str(e)}")
+            except Exception as e:
+                logger.error(f"❌ Error fetching message {message_id}: {str(e)}")
+            failed_ids.append(message_id)
+            return None
+        
+        logger.info(f"🌐 Fetching details for {len(message_ids)} messages")
+        with ThreadPoolExecutor(max_workers=min(MESSAGE_FETCH_WORKERS, len(message_ids))) as executor:
+            messages = [msg_data for msg_data in executor.map(fetch_message, message_ids) if msg_data]
+        return messages, failed_ids
+
     def get_tokens(self) -> dict:
         """Get stored tokens (for debugging/testing)"""
         tokens = self._get_tokens_from_db()
@@ -925,6 +1130,7 @@ class GoogleService:
 
     def clear_tokens(self) -> dict:
         """Clear stored tokens and disconnect connection"""
+        self._reset_service_cache()
         try:
             # Import here to avoid circular imports
             from services.connections_service import connections_service
@@ -959,17 +1165,17 @@ class GoogleService:
             return None, {"error": "User not authenticated"}
 
         try:
-            # Check if token needs refresh
-            if not self._refresh_token_if_needed():
-                logger.error(f"❌ Token refresh failed for user {self.internal_user_id}")
-                return None, {"error": "Authentication failed"}
-            
-            # Get fresh tokens after potential refresh
-            tokens = self._get_tokens_from_db()
+            # Refresh the token if needed, reusing the tokens we already read
+            tokens = self._ensure_fresh_tokens(tokens)
             if not tokens:
-                logger.error(f"❌ No tokens found after refresh for user {self.internal_user_id}")
+                logger.error(f"❌ Token refresh failed for user {self.internal_user_id}")
                 return None, {"error": "Authentication failed"}
 
+            # Reuse the cached service while the access token is unchanged
+            if self._service and self._service_token == tokens.access_token:
+                logger.debug(f"♻️ Reusing cached Gmail service for user {self.internal_user_id}")
+                return self._service, None
+
             # Build credentials object
             creds_obj = Credentials(
                 tokens.access_token,
@@ -979,8 +1185,13 @@ class GoogleService:
                 client_secret=self.client_secret,
             )
             
-            # Build Gmail service
+            # Build Gmail service; the new token may belong to a different account,
+            # so the cached address is dropped along with the old service
             service = build('gmail', 'v1', credentials=creds_obj)
+            self._reset_service_cache()
+            self._service = service
+            self._service_token = tokens.access_token
+            self._credentials = creds_obj
             logger.info(f"✅ Gmail service authenticated successfully for user {self.internal_user_id}")
             
             return service, None
@@ -989,23 +1200,31 @@ class GoogleService:
             logger.error(f"❌ Error getting Gmail service for user {self.internal_user_id}: {str(e)}")
             return None, {"error": f"Authentication failed: {str(e)}"}
 
-    def _refresh_token_if_needed(self) -> bool:
-        """Refresh access token if it's expired or about to expire"""
+    def _ensure_fresh_tokens(self, tokens: Optional[OAuthToken] = None) -> Optional[OAuthToken]:
+        """Return current tokens, refreshing the access token if it's expired or about to expire.
+        
+        Args:
+            tokens: Tokens already read from the database; looked up if not provided
+        
+        Returns:
+            The (possibly refreshed) tokens, or None if no valid token is available
+        """
         logger.info(f"🔄 Checking if token refresh is needed for user {self.internal_user_id}")
         
-        tokens = self._get_tokens_from_db()
+        if tokens is None:
+            tokens = self._get_tokens_from_db()
         if not tokens:
             logger.warning(f"❌ No tokens found for user {self.internal_user_id}")
             # Mark connection disconnected on first failure
             self._mark_gmail_connection_disconnected_if_needed()
-            return False
+            return None
         
         # Check if token is expired or expires in the next 5 minutes
         # Ensure we're using timezone-aware datetime for comparison
         now = datetime.now(timezone.utc)
         
-        # Ensure database datetime is in UTC for comparison
-        expires_at = self._ensure_utc(tokens.expires_at)
+        # OAuthToken normalizes expires_at to UTC when it is built
+        expires_at = tokens.expires_at
             
         time_until_expiry = expires_at - now
         logger.info(f"⏰ Token expires in {time_until_expiry.total_seconds():.0f} seconds")
@@ -1013,14 +1232,14 @@ class GoogleService:
         # If token is still valid (more than 5 minutes left), no refresh needed
         if now < (expires_at - timedelta(minutes=5)):
             logger.info(f"✅ Token is still valid for user {self.internal_user_id} (expires in {time_until_expiry.total_seconds():.0f} seconds)")
-            return True
+            return tokens
         
         # Token needs refresh - NOW check if we have a refresh token
         if not tokens.refresh_token:
             logger.error(f"❌ Token expired/expiring but no refresh token available for user {self.internal_user_id}")
             # Mark connection disconnected on first failure
             self._mark_gmail_connection_disconnected_if_needed()
-            return False
+            return None
             
         logger.info(f"🔄 Token needs refresh (expires within 5 minutes), refreshing now...")
         
@@ -1051,18 +1270,18 @@ class GoogleService:
                 scope=tokens.scope or " ".join(self.scopes)
             ):
                 logger.info(f"✅ Token refreshed successfully for user {self.internal_user_id}")
-                return True
+                return tokens.model_copy(update={"access_token": creds.token, "expires_at": new_expires_at})
             else:
                 logger.error(f"❌ Failed to save refreshed token for user {self.internal_user_id}")
                 # Mark connection disconnected on failure to persist refreshed token
                 self._mark_gmail_connection_disconnected_if_needed()
-                return False
+                return None
             
         except Exception as e:
             logger.error(f"❌ Failed to refresh token for user {self.internal_user_id}: {str(e)}")
             # Mark connection disconnected on first failure
             self._mark_gmail_connection_disconnected_if_needed()
-            return False
+            return None
 
     def get_token_info(self) -> dict:
         """Get token information including expiry"""
@@ -1102,8 +1321,13 @@ class GoogleService:
         except Exception as e:
             logger.error(f"❌ Error marking Gmail connection disconnected: {str(e)}")
 
-    def get_single_email_from_db(self, email_id: str) -> Optional[dict]:
-        """Get a single email from database by gmail_id with full body content"""
+    def get_single_email_from_db(self, email_id: str, load_body: bool = True) -> Optional[dict]:
+        """Get a single email from database by gmail_id with full body content
+        
+        Args:
+            email_id: Gmail message ID
+            load_body: If True, fetch the body from Gmail when it hasn't been loaded yet
+        """
         if not self.internal_user_id:
             logger.warning("❌ No internal_user_id available, cannot retrieve email")
             return None
@@ -1111,11 +1335,12 @@ class GoogleService:
         try:
             logger.info(f"🔍 Retrieving email {email_id} from database for user {self.internal_user_id}")
             
-            result = self.supabase.table("emails").select("*").eq("user_id", str(self.internal_user_id)).eq("gmail_id", email_id).single().execute()
+            result = self.supabase.table("emails").select(EMAIL_FULL_COLUMNS).eq("user_id", str(self.internal_user_id)).eq("gmail_id", email_id).limit(1).execute()
             
             if result.data:
+                email = self._fetch_body_if_missing(result.data[0]) if load_body else result.data[0]
                 # Format the email for full display (including body content)
-                formatted_email = self._format_full_email(result.data)
+                formatted_email = self._format_full_email(email)
                 logger.info(f"✅ Found email in database: {formatted_email.get('subject', 'No Subject')}")
                 return formatted_email
             else:
@@ -1126,6 +1351,75 @@ class GoogleService:
             logger.error(f"❌ Error retrieving email {email_id} from database: {str(e)}")
             return None
 
+    def _fetch_body_if_missing(self, email: dict) -> dict:
+        """Load the body of an email synced as metadata only, storing it for later views"""
+        return self._fetch_bodies_if_missing([email])[0]
+
+    def _fetch_bodies_if_missing(self, emails: List[dict]) -> List[dict]:
+        """Load the bodies of emails synced as metadata only in one batch, storing them for later views"""
+        missing_ids = [
+            email.get('gmail_id') for email in emails
+            if email.get('body_text') is None and email.get('body_html') is None
+        ]
+        if not missing_ids:
+            return emails
+        
+        service, error = self._get_authenticated_gmail_service()
+        if error:
+            logger.warning(f"⚠️ Cannot load bodies for {len(missing_ids)} emails: {error.get('error', 'Unknown error')}")
+            return emails
+        
+        try:
+            logger.info(f"📥 Loading bodies for {len(missing_ids)} emails")
+            # Emails whose body fails to load are left as they are and retried on the next view
+            fetched, _ = self._fetch_messages(service, missing_ids, full=True)
+            messages = {msg_data['id']: msg_data for msg_data in fetched}
+            
+            loaded_emails = []
+            rows = []
+            for email in emails:
+                msg_data = messages.get(email.get('gmail_id'))
+                if msg_data is None:
+                    loaded_emails.append(email)
+                    continue
+                
+                payload = msg_data.get('payload', {})
+                body = self._extract_body(payload)
+                email = {
+                    **email,
+                    "body_text": body['text'],
+                    "body_html": body['html'],
+                    "has_attachments": self._has_attachments(payload)
+                }
+                loaded_emails.append(email)
+                rows.append({**email, "user_id": str(self.internal_user_id)})
+            
+            # Store all loaded bodies in one request
+            self._bulk_save_emails_to_db(rows)
+            
+            # Sync only categorized from the snippet; redo it with the body, off the request path
+            if rows:
+                _RECATEGORIZE_EXECUTOR.submit(self._recategorize_emails, rows)
+            return loaded_emails
+            
+        except Exception as e:
+            logger.error(f"❌ Error loading bodies for {len(missing_ids)} emails: {str(e)}")
+            return emails
+
+    def _recategorize_emails(self, emails: List[dict]) -> None:
+        """Re-categorize emails whose body has just been loaded, storing the new category"""
+        for email in emails:
+            category_data = self._categorize_email_row(email)
+            if not category_data:
+                continue
+            
+            try:
+                self.supabase.table("emails").update(category_data).eq(
+                    "user_id", str(self.internal_user_id)
+                ).eq("gmail_id", email.get('gmail_id')).execute()
+            except Exception as e:
+                logger.error(f"❌ Error saving category for email {email.get('gmail_id')}: {str(e)}")
+
     def send_email_reply(self, original_email_id: str, reply_body: str, reply_subject: str = None, 
                         to: Optional[List[str]] = None, cc: Optional[List[str]] = None, 
                         bcc: Optional[List[str]] = None) -> dict:
@@ -1140,7 +1434,7 @@ class GoogleService:
         try:
             # Get original email data from our database (no API call needed!)
             logger.info(f"🔍 Getting original email {original_email_id} data from database")
-            original_email = self.get_single_email_from_db(original_email_id)
+            original_email = self.get_single_email_from_db(original_email_id, load_body=False)
             
             if not original_email:
                 return {"error": f"Original email {original_email_id} not found in database"}
@@ -1159,21 +1453,23 @@ class GoogleService:
                 logger.info(f"📧 Using custom TO recipients: {', '.join(reply_to_emails)}")
             else:
                 # Default behavior: reply to original sender
-                email_match = re.search(r'<(.+?)>', original_from)
+                email_match = _ANGLE_ADDR_RE.search(original_from)
                 reply_to_email = email_match.group(1) if email_match else original_from
                 reply_to_emails = [reply_to_email]
                 logger.info(f"📧 Using default TO recipient: {reply_to_email}")
             
-            # Get user's email address for 'from' field
-            user_profile = service.users().getProfile(userId='me').execute()
-            user_email = user_profile.get('emailAddress', '')
+            # Get user's email address for 'from' field (cached after the first lookup)
+            if not self._user_email:
+                user_profile = service.users().getProfile(userId='me').execute()
+                self._user_email = user_profile.get('emailAddress', '')
+            user_email = self._user_email
             
             # Prepare reply subject
             if not reply_subject:
                 reply_subject = f"Re: {original_subject}" if not original_subject.startswith('Re:') else original_subject
             
             # Create the reply message
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg['From'] = user_email
             msg['To'] = ', '.join(reply_to_emails)
             msg['Subject'] = reply_subject
@@ -1190,11 +1486,11 @@ class GoogleService:
             # Note: Gmail threading works primarily with threadId, so we don't need
             # the original message-id headers. Gmail will handle threading automatically.
             
-            # Add the reply body
-            msg.attach(MIMEText(reply_body, 'plain'))
+            # Add the reply body (plain text only, so no multipart container is needed)
+            msg.set_content(reply_body)
             
             # Encode the message
-            raw_message = base64.urlsafe_b64encode(msg.as_bytes()).decode('utf-8')
+            raw_message = base64.urlsafe_b64encode(msg.as_bytes()).decode('ascii')
             
             # Prepare all recipients for Gmail API (TO + CC + BCC)
             all_recipients = reply_to_emails[:]
@@ -1,79 +1,124 @@
 import os
 import logging
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Union
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
 from uuid import UUID
-from dotenv import load_dotenv
 from database import get_supabase
 from models import OAuthToken, ConnectionProvider, ConnectionStatus
 from services.connections_service import connections_service
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# Slack OAuth app settings, read once at import
+SLACK_CLIENT_ID = os.getenv("SLACK_CLIENT_ID")
+SLACK_CLIENT_SECRET = os.getenv("SLACK_CLIENT_SECRET")
+SLACK_REDIRECT_URI = os.getenv("SLACK_REDIRECT_URI")
+
+# In-process cache of Slack tokens keyed by internal user id, so repeated
+# lookups within a request don't each hit Supabase
+TOKEN_CACHE_TTL_SECONDS = 60
+_TOKEN_CACHE: Dict[str, Tuple[OAuthToken, float]] = {}
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+def invalidate_slack_token_cache(internal_user_id: Optional[str]) -> None:
+    """Drop a user's cached Slack tokens, e.g. after they are saved or disconnected"""
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE.pop(internal_user_id, None)
+
+# Shared HTTP session so Slack API calls reuse pooled keep-alive connections,
+# with (connect, read) timeouts so a slow Slack endpoint can't hang a worker
+SLACK_HTTP_TIMEOUT = (3, 10)
+_SLACK_HTTP = requests.Session()
+_SLACK_HTTP.mount(
+    "https://",
+    HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.2))
+)
 
 class SlackService:
+    SCOPES = (
+        "channels:read",
+        "channels:history",
+        "users:read",
+        "team:read"
+    )
+    SCOPE_STRING = ",".join(SCOPES)
+    
     def __init__(self, internal_user_id: Optional[Union[str, UUID]] = None):
-        self.client_id = os.environ["SLACK_CLIENT_ID"]
-        self.client_secret = os.environ["SLACK_CLIENT_SECRET"]
-        self.redirect_uri = os.environ["SLACK_REDIRECT_URI"]
+        self.client_id = SLACK_CLIENT_ID
+        self.client_secret = SLACK_CLIENT_SECRET
+        self.redirect_uri = SLACK_REDIRECT_URI
         self.internal_user_id = str(internal_user_id) if internal_user_id else None
-        self.scopes = [
-            "channels:read",
-            "channels:history",
-            "users:read",
-            "team:read"
-        ]
         self.supabase = get_supabase()
         
         # Log initialization
         if self.internal_user_id:
-            logger.info(f"🔧 SlackService initialized for internal_user_id: {self.internal_user_id}")
+            logger.info("🔧 SlackService initialized for internal_user_id: %s", self.internal_user_id)
         else:
             logger.info("🔧 SlackService initialized without user context")
 
     def _ensure_utc(self, dt: datetime) -> datetime:
         """Ensure a datetime is in UTC timezone"""
-        if dt.tzinfo is None:
+        tz = dt.tzinfo
+        if tz is None:
             return dt.replace(tzinfo=timezone.utc)
+        if tz is timezone.utc:
+            # Already UTC (the common case), skip the conversion
+            return dt
         return dt.astimezone(timezone.utc)
 
     def _get_tokens_from_db(self) -> Optional[OAuthToken]:
+        """Retrieve tokens, serving recent lookups from the in-process cache"""
+        if self.internal_user_id:
+            cached = _TOKEN_CACHE.get(self.internal_user_id)
+            if cached and cached[1] > time.monotonic():
+                logger.debug("⚡ Using cached Slack tokens for user %s", self.internal_user_id)
+                return cached[0]
+        
+        token = self._load_tokens_from_db()
+        if token:
+            with _TOKEN_CACHE_LOCK:
+                _TOKEN_CACHE[self.internal_user_id] = (token, time.monotonic() + TOKEN_CACHE_TTL_SECONDS)
+        return token
+
+    def _invalidate_token_cache(self) -> None:
+        """Drop this user's cached tokens after they change"""
+        invalidate_slack_token_cache(self.internal_user_id)
+
+    def _load_tokens_from_db(self) -> Optional[OAuthToken]:
         """Retrieve tokens from database through connections table"""
-        logger.info(f"🔍 Retrieving Slack tokens for internal_user_id: {self.internal_user_id}")
+        logger.info("🔍 Retrieving Slack tokens for internal_user_id: %s", self.internal_user_id)
         
         if not self.internal_user_id:
             logger.warning("❌ No internal_user_id available, cannot retrieve tokens")
             return None
             
         try:
-            # First, get the Slack connection for this user
-            logger.debug(f"📊 Looking up Slack connection for user_id: {self.internal_user_id}")
-            connection_result = self.supabase.table("connections").select("oauth_token_id").eq("user_id", str(self.internal_user_id)).eq("connection_provider", "slack").single().execute()
+            # Get the Slack connection together with its OAuth token in one request
+            logger.debug("📊 Looking up Slack connection and token for user_id: %s", self.internal_user_id)
+            result = self.supabase.table("connections").select("oauth_token_id, oauth_tokens(id, provider, access_token, refresh_token, token_type, expires_at, scope)").eq("user_id", str(self.internal_user_id)).eq("connection_provider", "slack").limit(1).execute()
+            connection = result.data[0] if result.data else None
             
-            if not connection_result.data or not connection_result.data.get('oauth_token_id'):
-                logger.info(f"🔍 No Slack connection or oauth_token_id found for user {self.internal_user_id}")
+            if not connection or not connection.get('oauth_token_id'):
+                logger.info("🔍 No Slack connection or oauth_token_id found for user %s", self.internal_user_id)
                 return None
             
-            oauth_token_id = connection_result.data['oauth_token_id']
-            logger.debug(f"📊 Found oauth_token_id: {oauth_token_id}, retrieving token details")
-            
-            # Now get the OAuth token using the ID from connection
-            token_result = self.supabase.table("oauth_tokens").select("*").eq("id", oauth_token_id).eq("provider", "slack").single().execute()
-            
-            if token_result.data:
-                token = OAuthToken(**token_result.data)
-                logger.info(f"✅ Found Slack tokens for user {self.internal_user_id}, expires at: {token.expires_at}")
+            token_data = connection.get('oauth_tokens')
+            if token_data and token_data.get('provider') == "slack":
+                token = OAuthToken(**token_data)
+                logger.info("✅ Found Slack tokens for user %s, expires at: %s", self.internal_user_id, token.expires_at)
                 return token
             else:
-                logger.info(f"🔍 No OAuth token found with ID {oauth_token_id}")
+                logger.info("🔍 No OAuth token found with ID %s", connection['oauth_token_id'])
                 return None
                 
         except Exception as e:
-            logger.error(f"❌ Error retrieving Slack tokens for user {self.internal_user_id}: {str(e)}")
+            logger.error("❌ Error retrieving Slack tokens for user %s: %s", self.internal_user_id, e)
             return None
 
     def _save_tokens_to_db(
@@ -90,9 +135,12 @@ class SlackService:
                 logger.error("❌ Cannot save tokens: no user ID provided")
                 return False
 
+            now = datetime.now(timezone.utc)
+            now_iso = now.isoformat()
+            
             # Default expiry to 12 hours if not provided (Slack tokens don't typically expire)
             if expires_at is None:
-                expires_at = datetime.now(timezone.utc) + timedelta(hours=12)
+                expires_at = now + timedelta(hours=12)
             
             expires_at = self._ensure_utc(expires_at)
             
@@ -103,20 +151,22 @@ class SlackService:
                 "token_type": "Bearer",
                 "expires_at": expires_at.isoformat(),
                 "scope": scope,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "created_at": now_iso,
+                "updated_at": now_iso
             }
             
-            logger.info(f"💾 Saving Slack tokens to database for user {self.internal_user_id}")
+            logger.info("💾 Saving Slack tokens to database for user %s", self.internal_user_id)
+            
+            # Look up the existing connection (and its token id) in one query
+            connection_result = self.supabase.table("connections").select("oauth_token_id").eq("user_id", self.internal_user_id).eq("connection_provider", "slack").limit(1).execute()
+            connection = connection_result.data[0] if connection_result.data else None
+            oauth_token_id = connection.get('oauth_token_id') if connection else None
             
-            # Check if we have an existing connection with oauth_token_id
-            existing_token = self._get_tokens_from_db()
-            if existing_token:
-                logger.info(f"🔄 Updating existing tokens for user {self.internal_user_id}")
-                result = self.supabase.table("oauth_tokens").update(token_data).eq("id", existing_token.id).execute()
-                oauth_token_id = existing_token.id
+            if oauth_token_id:
+                logger.info("🔄 Updating existing tokens for user %s", self.internal_user_id)
+                result = self.supabase.table("oauth_tokens").upsert({**token_data, "id": oauth_token_id}, on_conflict="id").execute()
             else:
-                logger.info(f"➕ Inserting new tokens for user {self.internal_user_id}")
+                logger.info("➕ Inserting new tokens for user %s", self.internal_user_id)
                 result = self.supabase.table("oauth_tokens").insert(token_data).execute()
                 if result.data and len(result.data) > 0:
                     oauth_token_id = result.data[0]['id']
@@ -124,28 +174,30 @@ class SlackService:
                     logger.error("❌ Failed to get oauth_token_id from insert result")
                     return False
             
-            # Update the connection with the oauth_token_id
+            # Point the connection at the oauth_token_id
             if oauth_token_id:
-                logger.debug(f"🔗 Updating connection with oauth_token_id: {oauth_token_id}")
-                
-                # First, try to update existing connection
-                connection_update = self.supabase.table("connections").update({
-                    "oauth_token_id": oauth_token_id,
-                    "status": ConnectionStatus.CONNECTED.value,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }).eq("user_id", self.internal_user_id).eq("connection_provider", "slack").execute()
+                logger.debug("🔗 Updating connection with oauth_token_id: %s", oauth_token_id)
                 
-                # Check if update affected any rows
-                if connection_update.data and len(connection_update.data) > 0:
-                    logger.info("✅ Successfully updated existing connection")
-                    return True
+                if connection:
+                    connection_update = self.supabase.table("connections").update({
+                        "oauth_token_id": oauth_token_id,
+                        "status": ConnectionStatus.CONNECTED.value,
+                        "updated_at": now_iso
+                    }).eq("user_id", self.internal_user_id).eq("connection_provider", "slack").execute()
+                    
+                    if connection_update.data:
+                        logger.info("✅ Successfully updated existing connection")
+                        return True
+                    else:
+                        logger.error("❌ Failed to update existing connection")
+                        return False
                 else:
                     # No existing connection found, create a new one
                     logger.info("🔗 No existing connection found, creating new one")
                     
                     metadata = {
-                        "scopes": self.scopes,
-                        "connected_at": datetime.now(timezone.utc).isoformat()
+                        "scopes": self.SCOPES,
+                        "connected_at": now_iso
                     }
                     
                     if team_info:
@@ -161,8 +213,8 @@ class SlackService:
                         "status": ConnectionStatus.CONNECTED.value,
                         "oauth_token_id": oauth_token_id,
                         "metadata": metadata,
-                        "created_at": datetime.now(timezone.utc).isoformat(),
-                        "updated_at": datetime.now(timezone.utc).isoformat()
+                        "created_at": now_iso,
+                        "updated_at": now_iso
                     }
                     
                     connection_create = self.supabase.table("connections").insert(connection_data).execute()
@@ -178,17 +230,22 @@ class SlackService:
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Error saving Slack tokens to database: {str(e)}")
+            logger.error("❌ Error saving Slack tokens to database: %s", e)
             return False
+        finally:
+            # Only drop the cache once the writes are done, so a concurrent read
+            # can't re-cache the old token in between
+            self._invalidate_token_cache()
 
     def _create_slack_connection(self, oauth_token_id: str = None, team_info: dict = None) -> bool:
         """Create Slack connection record after successful OAuth"""
         try:
-            logger.info(f"🔗 Creating Slack connection record for user {self.internal_user_id}")
+            logger.info("🔗 Creating Slack connection record for user %s", self.internal_user_id)
+            now_iso = datetime.now(timezone.utc).isoformat()
             
             metadata = {
-                "scopes": self.scopes,
-                "connected_at": datetime.now(timezone.utc).isoformat()
+                "scopes": self.SCOPES,
+                "connected_at": now_iso
             }
             
             if team_info:
@@ -215,7 +272,7 @@ class SlackService:
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Error creating Slack connection record: {str(e)}")
+            logger.error("❌ Error creating Slack connection record: %s", e)
             return False
 
     def get_authorization_url(self, state: str = None) -> str:
@@ -226,14 +283,12 @@ class SlackService:
         if not self.redirect_uri:
             raise ValueError("SLACK_REDIRECT_URI environment variable not set")
         
-        logger.info(f"🌐 Generating Slack authorization URL for user {self.internal_user_id}")
+        logger.info("🌐 Generating Slack authorization URL for user %s", self.internal_user_id)
         
         # Build authorization URL
-        scope_string = ",".join(self.scopes)
-        
         params = {
             "client_id": self.client_id,
-            "scope": scope_string,
+            "scope": self.SCOPE_STRING,
             "redirect_uri": self.redirect_uri,
             "response_type": "code"
         }
@@ -243,7 +298,7 @@ class SlackService:
         
         # Build URL manually to ensure proper encoding
         base_url = "https://slack.com/oauth/v2/authorize"
-        param_string = "&".join([f"{k}={requests.utils.quote(str(v))}" for k, v in params.items()])
+        param_string = urlencode(params, quote_via=quote, safe="/")
         authorization_url = f"{base_url}?{param_string}"
         
         logger.info("✅ Successfully generated Slack authorization URL")
@@ -267,14 +322,14 @@ class SlackService:
                 "redirect_uri": self.redirect_uri
             }
             
-            response = requests.post(token_url, data=payload)
+            response = _SLACK_HTTP.post(token_url, data=payload, timeout=SLACK_HTTP_TIMEOUT)
             response.raise_for_status()
             
             token_data = response.json()
             
             if not token_data.get("ok"):
                 error = token_data.get("error", "Unknown error")
-                logger.error(f"❌ Slack OAuth error: {error}")
+                logger.error("❌ Slack OAuth error: %s", error)
                 return {"error": f"Slack OAuth failed: {error}"}
             
             access_token = token_data.get("access_token")
@@ -286,30 +341,29 @@ class SlackService:
             
             # Get team information
             team_info = token_data.get("team", {})
-            scope_string = ",".join(self.scopes)
             
             # Slack tokens typically don't expire, but we'll set a far future date
             expires_at = datetime.now(timezone.utc) + timedelta(days=365)
             
-            logger.info(f"💾 Attempting to save tokens for user {self.internal_user_id}")
+            logger.info("💾 Attempting to save tokens for user %s", self.internal_user_id)
             
             # Save tokens to database
             if self._save_tokens_to_db(
                 access_token=access_token,
                 refresh_token="",  # Slack doesn't use refresh tokens in OAuth v2
                 expires_at=expires_at,
-                scope=scope_string,
+                scope=self.SCOPE_STRING,
                 team_info=team_info
             ):
-                logger.info(f"✅ Slack OAuth flow completed successfully for user {self.internal_user_id}")
+                logger.info("✅ Slack OAuth flow completed successfully for user %s", self.internal_user_id)
                 
                 return {"message": "Slack authentication complete. Tokens saved to database."}
             else:
-                logger.error(f"❌ Failed to save tokens to database for user {self.internal_user_id}")
+                logger.error("❌ Failed to save tokens to database for user %s", self.internal_user_id)
                 return {"error": "Failed to save tokens to database"}
                 
         except Exception as e:
-            logger.error(f"❌ Error in Slack OAuth callback: {str(e)}")
+            logger.error("❌ Error in Slack OAuth callback: %s", e)
             return {"error": f"OAuth callback failed: {str(e)}"}
 
     def refresh_access_token(self) -> bool:
@@ -319,20 +373,16 @@ class SlackService:
         is here for consistency with other OAuth providers.
         """
         try:
-            logger.info(f"🔄 Checking Slack token status for user {self.internal_user_id}")
+            logger.info("🔄 Checking Slack token status for user %s", self.internal_user_id)
             
-            # Get current token from database
+            # Get current token, served from the short-lived token cache when warm
             token_record = self._get_tokens_from_db()
             if not token_record:
                 logger.warning("⚠️ No Slack token found for user")
                 return False
             
-            expires_at = token_record.expires_at
-            if isinstance(expires_at, str):
-                expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-            
-            # Check if token is still valid (with 1 hour buffer)
-            if expires_at > datetime.now(timezone.utc) + timedelta(hours=1):
+            # Check if token is still valid (with 1 hour buffer); expires_at is already aware UTC
+            if token_record.expires_at > datetime.now(timezone.utc) + timedelta(hours=1):
                 logger.info("✅ Slack token is still valid")
                 return True
             
@@ -343,6 +393,7 @@ class SlackService:
             logger.warning("⚠️ Slack token expired - user needs to re-authenticate")
             
             # Update connection status to require refresh
+            self._invalidate_token_cache()
             connections_service.create_or_update_connection(
                 user_id=self.internal_user_id,
                 provider=ConnectionProvider.SLACK,
@@ -352,7 +403,7 @@ class SlackService:
             return False
             
         except Exception as e:
-            logger.error(f"❌ Error refreshing Slack token: {str(e)}")
+            logger.error("❌ Error refreshing Slack token: %s", e)
             return False
 
     def get_valid_token(self) -> Optional[str]:
@@ -367,7 +418,7 @@ class SlackService:
             return None
             
         except Exception as e:
-            logger.error(f"❌ Error getting valid Slack token: {str(e)}")
+            logger.error("❌ Error getting valid Slack token: %s", e)
             return None
 
     def test_connection(self) -> bool:
@@ -379,12 +430,12 @@ class SlackService:
             
             # Test the connection by calling Slack's auth.test endpoint
             headers = {"Authorization": f"Bearer {token}"}
-            response = requests.get("https://slack.com/api/auth.test", headers=headers)
+            response = _SLACK_HTTP.get("https://slack.com/api/auth.test", headers=headers, timeout=SLACK_HTTP_TIMEOUT)
             response.raise_for_status()
             
             result = response.json()
             return result.get("ok", False)
             
         except Exception as e:
-            logger.error(f"❌ Error testing Slack connection: {str(e)}")
+            logger.error("❌ Error testing Slack connection: %s", e)
             return False 
\ No newline at end of file
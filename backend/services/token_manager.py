@@ -1,6 +1,8 @@
 """Token manager service for automatic OAuth token refresh."""
 
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Dict, Any
 from uuid import UUID
 from services.google_service import GoogleService
@@ -9,6 +11,19 @@ from models import ConnectionProvider
 
 logger = logging.getLogger(__name__)
 
+
+@functools.lru_cache(maxsize=1024)
+def _get_google_service(user_id: str) -> GoogleService:
+    """Return the shared GoogleService for a user, created on first use"""
+    return GoogleService(internal_user_id=user_id)
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_slack_service(user_id: str) -> SlackService:
+    """Return the shared SlackService for a user, created on first use"""
+    return SlackService(internal_user_id=user_id)
+
+
 class TokenManager:
     """Manages automatic token refresh for OAuth providers."""
     
@@ -26,10 +41,10 @@ class TokenManager:
             Valid access token or None if unavailable/expired
         """
         try:
-            logger.info(f"🔑 Getting valid token for {provider.value} for user {user_id}")
+            logger.info("🔑 Getting valid token for %s for user %s", provider.value, user_id)
             
             if provider == ConnectionProvider.GMAIL:
-                google_service = GoogleService(internal_user_id=user_id)
+                google_service = _get_google_service(str(user_id))
                 
                 # Try to refresh the token first
                 if google_service.refresh_access_token():
@@ -38,24 +53,24 @@ class TokenManager:
                     if tokens:
                         return tokens.access_token
                     else:
-                        logger.warning(f"⚠️ No tokens found after refresh for user {user_id}")
+                        logger.warning("⚠️ No tokens found after refresh for user %s", user_id)
                         return None
                 else:
-                    logger.warning(f"⚠️ Failed to refresh Gmail token for user {user_id}")
+                    logger.warning("⚠️ Failed to refresh Gmail token for user %s", user_id)
                     return None
                     
             elif provider == ConnectionProvider.SLACK:
-                slack_service = SlackService(internal_user_id=user_id)
+                slack_service = _get_slack_service(str(user_id))
                 
                 # For Slack, get the valid token (refresh is handled internally)
                 return slack_service.get_valid_token()
                 
             else:
-                logger.error(f"❌ Unsupported provider: {provider}")
+                logger.error("❌ Unsupported provider: %s", provider)
                 return None
                 
         except Exception as e:
-            logger.error(f"❌ Error getting valid token for {provider.value}: {str(e)}")
+            logger.error("❌ Error getting valid token for %s: %s", provider.value, e)
             return None
     
     @staticmethod
@@ -72,19 +87,19 @@ class TokenManager:
         """
         try:
             if provider == ConnectionProvider.GMAIL:
-                google_service = GoogleService(internal_user_id=user_id)
+                google_service = _get_google_service(str(user_id))
                 return google_service.test_connection()
                 
             elif provider == ConnectionProvider.SLACK:
-                slack_service = SlackService(internal_user_id=user_id)
+                slack_service = _get_slack_service(str(user_id))
                 return slack_service.test_connection()
                 
             else:
-                logger.error(f"❌ Unsupported provider: {provider}")
+                logger.error("❌ Unsupported provider: %s", provider)
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Error testing token validity for {provider.value}: {str(e)}")
+            logger.error("❌ Error testing token validity for %s: %s", provider.value, e)
             return False
     
     @staticmethod
@@ -100,27 +115,27 @@ class TokenManager:
         """
         results = {}
         
+        # Providers refresh independently over the network, so run them concurrently
+        refreshers = {
+            'gmail': lambda: _get_google_service(str(user_id)).refresh_access_token(),
+            'slack': lambda: _get_slack_service(str(user_id)).refresh_access_token(),
+        }
+        
         try:
-            # Refresh Gmail token
-            try:
-                google_service = GoogleService(internal_user_id=user_id)
-                results['gmail'] = google_service.refresh_access_token()
-            except Exception as e:
-                logger.error(f"❌ Error refreshing Gmail token: {str(e)}")
-                results['gmail'] = False
-            
-            # Check Slack token (Slack tokens typically don't need refresh)
-            try:
-                slack_service = SlackService(internal_user_id=user_id)
-                results['slack'] = slack_service.refresh_access_token()
-            except Exception as e:
-                logger.error(f"❌ Error checking Slack token: {str(e)}")
-                results['slack'] = False
+            with ThreadPoolExecutor(max_workers=len(refreshers)) as executor:
+                futures = {executor.submit(refresh): provider for provider, refresh in refreshers.items()}
+                for future in as_completed(futures):
+                    provider = futures[future]
+                    try:
+                        results[provider] = future.result()
+                    except Exception as e:
+                        logger.error("❌ Error refreshing %s token: %s", provider, e)
+                        results[provider] = False
             
             return results
             
         except Exception as e:
-            logger.error(f"❌ Error refreshing tokens for user {user_id}: {str(e)}")
+            logger.error("❌ Error refreshing tokens for user %s: %s", user_id, e)
             return {'gmail': False, 'slack': False}
 
 # Create singleton instance
@@ -1,14 +1,29 @@
+import functools
 import logging
+import threading
+import time
 import yaml
-from typing import Dict, Optional
-from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
 from database import get_supabase
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# In-process cache of prompt configs keyed by user id; the config is read for
+# every email categorized during a sync
+PROMPT_CACHE_TTL_SECONDS = 60
+_PROMPT_CACHE: Dict[str, Tuple[Dict, float]] = {}
+_PROMPT_CACHE_LOCK = threading.Lock()
+
+DEFAULT_TEMPLATE_PATH = Path(__file__).parent.parent / "prompts" / "email_categorization.yaml"
+
+@functools.lru_cache(maxsize=1)
+def _load_default_template() -> str:
+    """Read the default prompt template once; the YAML file doesn't change at runtime"""
+    with open(DEFAULT_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+        return config.get('template', '')
+
 class UserPromptService:
     """Service for managing user-specific email categorization prompts"""
     
@@ -18,53 +33,65 @@ class UserPromptService:
     def get_default_prompt_template(self) -> str:
         """Get the default prompt template from YAML file"""
         try:
-            config_path = Path(__file__).parent.parent / "prompts" / "email_categorization.yaml"
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                return config.get('template', '')
+            return _load_default_template()
         except Exception as e:
-            logger.warning(f"⚠️ Could not load default template: {str(e)}")
+            logger.warning("⚠️ Could not load default template: %s", e)
             raise e
     
     def get_user_prompt_config(self, user_id: str) -> Dict:
-        """Get the active prompt configuration for a user"""
+        """Get the active prompt configuration for a user, serving recent lookups from cache"""
+        cached = _PROMPT_CACHE.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            # Hand out a copy so callers can't mutate the shared cached entry
+            return dict(cached[0])
+        
+        config = self._load_user_prompt_config(user_id)
+        # Only cache real rows so a transient fallback doesn't stick
+        if config.get('id'):
+            with _PROMPT_CACHE_LOCK:
+                _PROMPT_CACHE[user_id] = (dict(config), time.monotonic() + PROMPT_CACHE_TTL_SECONDS)
+        return config
+    
+    def _invalidate_prompt_cache(self, user_id: str) -> None:
+        """Drop a user's cached prompt config after it changes"""
+        with _PROMPT_CACHE_LOCK:
+            _PROMPT_CACHE.pop(user_id, None)
+    
+    def _load_user_prompt_config(self, user_id: str) -> Dict:
+        """Load the active prompt configuration for a user, creating the default in the same call"""
         
         try:
-            # Don't use .single() as it throws error when no rows found
-            result = self.supabase.table("user_prompts").select("*").eq("user_id", user_id).eq("is_active", True).eq("name", "email_categorization").execute()
+            result = self.supabase.rpc("get_or_create_user_prompt", {
+                "uid": user_id,
+                "default_template": self.get_default_prompt_template()
+            }).execute()
             
-            if result.data and len(result.data) > 0:
-                prompt_data = result.data[0]
-                return {
-                    'id': prompt_data['id'],
-                    'name': prompt_data['name'],
-                    'model': prompt_data['model'],
-                    'temperature': float(prompt_data['temperature']),
-                    'max_tokens': prompt_data['max_tokens'],
-                    'timeout': prompt_data['timeout'],
-                    'prompt_version': prompt_data['prompt_version'],
-                    'template': prompt_data['template'],
-                    'created_at': prompt_data['created_at'],
-                    'updated_at': prompt_data['updated_at']
-                }
+            if result.data:
+                return self._to_config(result.data[0])
             else:
-                # No custom prompt found, create default prompt for user
-                logger.info(f"📝 Creating default prompt for user {user_id}")
-                return self.create_default_prompt_for_user(user_id)
+                logger.warning("⚠️ No prompt returned for user %s, using fallback", user_id)
+                return self.get_fallback_config()
                 
         except Exception as e:
-            logger.error(f"❌ Error getting user prompt config: {str(e)}")
-            # Check if it's the "no rows" error and try to create default
-            if "PGRST116" in str(e) or "0 rows" in str(e):
-                logger.info(f"📝 No prompt found, creating default for user {user_id}")
-                try:
-                    return self.create_default_prompt_for_user(user_id)
-                except Exception as create_error:
-                    logger.error(f"❌ Failed to create default prompt: {str(create_error)}")
-                    return self.get_fallback_config()
+            logger.error("❌ Error getting user prompt config: %s", e)
             # Return fallback configuration
             return self.get_fallback_config()
     
+    def _to_config(self, prompt_data: Dict) -> Dict:
+        """Convert a user_prompts row into the prompt configuration dict"""
+        return {
+            'id': prompt_data['id'],
+            'name': prompt_data['name'],
+            'model': prompt_data['model'],
+            'temperature': float(prompt_data['temperature']),
+            'max_tokens': prompt_data['max_tokens'],
+            'timeout': prompt_data['timeout'],
+            'prompt_version': prompt_data['prompt_version'],
+            'template': prompt_data['template'],
+            'created_at': prompt_data['created_at'],
+            'updated_at': prompt_data['updated_at']
+        }
+    
     def create_default_prompt_for_user(self, user_id: str) -> Dict:
         """Create a default prompt configuration for a new user"""
         try:
@@ -85,71 +112,42 @@ class UserPromptService:
             result = self.supabase.table("user_prompts").insert(prompt_data).execute()
             
             if result.data:
-                created_prompt = result.data[0]
-                logger.info(f"✅ Created default prompt for user {user_id}")
-                return {
-                    'id': created_prompt['id'],
-                    'name': created_prompt['name'],
-                    'model': created_prompt['model'],
-                    'temperature': float(created_prompt['temperature']),
-                    'max_tokens': created_prompt['max_tokens'],
-                    'timeout': created_prompt['timeout'],
-                    'prompt_version': created_prompt['prompt_version'],
-                    'template': created_prompt['template'],
-                    'created_at': created_prompt['created_at'],
-                    'updated_at': created_prompt['updated_at']
-                }
+                logger.info("✅ Created default prompt for user %s", user_id)
+                return self._to_config(result.data[0])
             else:
                 raise Exception("Failed to create default prompt")
                 
         except Exception as e:
-            logger.error(f"❌ Error creating default prompt for user {user_id}: {str(e)}")
+            logger.error("❌ Error creating default prompt for user %s: %s", user_id, e)
             return self.get_fallback_config()
     
     def update_user_prompt(self, user_id: str, prompt_data: Dict) -> Dict:
         """Update user's prompt configuration"""
         try:
-            # Get current prompt
-            current_result = self.supabase.table("user_prompts").select("id").eq("user_id", user_id).eq("is_active", True).eq("name", "email_categorization").single().execute()
-            
             update_data = {
                 "model": prompt_data.get("model", "gpt-3.5-turbo"),
                 "temperature": prompt_data.get("temperature", 0.1),
                 "max_tokens": prompt_data.get("max_tokens", 200),
                 "timeout": prompt_data.get("timeout", 10),
-                "template": prompt_data.get("template"),
-                "prompt_version": str(float(prompt_data.get("prompt_version", "1.0")) + 0.1),  # Increment version
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "template": prompt_data.get("template")
             }
             
-            if current_result.data:
-                # Update existing prompt
-                prompt_id = current_result.data['id']
-                result = self.supabase.table("user_prompts").update(update_data).eq("id", prompt_id).execute()
-                
-                if result.data:
-                    logger.info(f"✅ Updated prompt for user {user_id}")
-                    return {"success": True, "message": "Prompt updated successfully"}
-                else:
-                    raise Exception("Failed to update prompt")
+            # Update (or create) the active prompt, incrementing its version server-side
+            result = self.supabase.rpc("bump_prompt_version", {"uid": user_id, "data": update_data}).execute()
+            
+            if result.data:
+                logger.info("✅ Updated prompt for user %s (version %s)", user_id, result.data[0]['prompt_version'])
+                return {"success": True, "message": "Prompt updated successfully"}
             else:
-                # Create new prompt
-                update_data.update({
-                    "user_id": user_id,
-                    "name": "email_categorization",
-                    "is_active": True
-                })
-                result = self.supabase.table("user_prompts").insert(update_data).execute()
-                
-                if result.data:
-                    logger.info(f"✅ Created new prompt for user {user_id}")
-                    return {"success": True, "message": "Prompt created successfully"}
-                else:
-                    raise Exception("Failed to create prompt")
+                raise Exception("Failed to update prompt")
                     
         except Exception as e:
-            logger.error(f"❌ Error updating user prompt: {str(e)}")
+            logger.error("❌ Error updating user prompt: %s", e)
             return {"success": False, "error": str(e)}
+        finally:
+            # Drop the cached config only after the write, so a concurrent read
+            # can't re-cache the old prompt in between
+            self._invalidate_prompt_cache(user_id)
     
     def get_fallback_config(self) -> Dict:
         """Get fallback configuration when database fails"""
@@ -0,0 +1,6 @@
+-- Add Gmail history tracking to connections table
+ALTER TABLE connections
+ADD COLUMN last_history_id VARCHAR(64);
+
+-- Add comment for documentation
+COMMENT ON COLUMN connections.last_history_id IS 'Gmail historyId recorded at the end of the last sync, used for incremental history.list syncs';
@@ -0,0 +1,17 @@
+-- Return a user's active email categorization prompt, creating the default one if missing
+CREATE OR REPLACE FUNCTION public.get_or_create_user_prompt(uid UUID, default_template TEXT)
+RETURNS SETOF user_prompts AS $$
+BEGIN
+  INSERT INTO user_prompts (user_id, name, template, is_active)
+  VALUES (uid, 'email_categorization', default_template, TRUE)
+  ON CONFLICT (user_id, name, is_active) WHERE is_active = TRUE DO NOTHING;
+
+  RETURN QUERY
+  SELECT * FROM user_prompts
+  WHERE user_id = uid AND name = 'email_categorization' AND is_active = TRUE
+  LIMIT 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add comment for documentation
+COMMENT ON FUNCTION public.get_or_create_user_prompt(UUID, TEXT) IS 'Fetch the active email_categorization prompt for a user, inserting the default in the same call when none exists';
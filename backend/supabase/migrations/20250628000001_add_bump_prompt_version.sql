@@ -0,0 +1,36 @@
+-- Update a user's active email categorization prompt and increment its version atomically,
+-- creating the prompt if the user doesn't have one yet
+CREATE OR REPLACE FUNCTION public.bump_prompt_version(uid UUID, data JSONB)
+RETURNS SETOF user_prompts AS $$
+BEGIN
+  RETURN QUERY
+  UPDATE user_prompts
+  SET model = data->>'model',
+      temperature = (data->>'temperature')::DECIMAL,
+      max_tokens = (data->>'max_tokens')::INTEGER,
+      timeout = (data->>'timeout')::INTEGER,
+      template = data->>'template',
+      prompt_version = ROUND(prompt_version::NUMERIC + 0.1, 1)::TEXT
+  WHERE user_id = uid AND name = 'email_categorization' AND is_active = TRUE
+  RETURNING *;
+
+  IF NOT FOUND THEN
+    RETURN QUERY
+    INSERT INTO user_prompts (user_id, name, model, temperature, max_tokens, timeout, template, is_active)
+    VALUES (
+      uid,
+      'email_categorization',
+      data->>'model',
+      (data->>'temperature')::DECIMAL,
+      (data->>'max_tokens')::INTEGER,
+      (data->>'timeout')::INTEGER,
+      data->>'template',
+      TRUE
+    )
+    RETURNING *;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add comment for documentation
+COMMENT ON FUNCTION public.bump_prompt_version(UUID, JSONB) IS 'Apply prompt settings to the active email_categorization prompt, incrementing prompt_version by 0.1 server-side';
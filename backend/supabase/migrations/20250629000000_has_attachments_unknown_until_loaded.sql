@@ -0,0 +1,7 @@
+-- Sync only fetches message metadata, so whether an email has attachments isn't
+-- known until its body is loaded; leave it NULL rather than defaulting to FALSE
+ALTER TABLE emails
+ALTER COLUMN has_attachments DROP DEFAULT;
+
+-- Add comment for documentation
+COMMENT ON COLUMN emails.has_attachments IS 'Whether email contains attachments; NULL until the email body has been loaded';
@@ -1,84 +1,127 @@
 """Pytest configuration and shared fixtures."""
 
 import pytest
-import asyncio
+import pytest_asyncio
 from datetime import datetime, timedelta
 from uuid import uuid4
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 from fastapi import Depends
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 import os
+from types import MappingProxyType
 import sys
 
 # Add backend directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from main import app
+# The app, API and service modules are imported inside the fixtures that need them,
+# so tests that never touch the app (tests/unit) don't pay for loading it
 from models import UserAuthData
-from services.auth_service import get_current_user_profile
+from tests.factories import UserAuthDataFactory, generate_prompt_config, generate_user_connections
+
+# Timestamps frozen at import so fixtures return plain constants
+_NOW_ISO = datetime.now().isoformat()
+_EXPIRES_AT = int((datetime.now() + timedelta(hours=1)).timestamp())
+
+# Static user profile shared by every test; built once at import and read-only so
+# no test can leak changes into the next
+MOCK_USER_PROFILE = MappingProxyType({
+    "id": "12345678-1234-1234-1234-123456789012",
+    "user_id": "12345678-1234-1234-1234-123456789012",
+    "email": "test@example.com",
+    "supabase_user_id": "87654321-4321-4321-4321-210987654321",
+    "full_name": "Test User",
+    "created_at": _NOW_ISO
+})
+
+@pytest.fixture(scope="session")
+def _app(_test_env):
+    """The FastAPI app, imported on first use."""
+    from main import app
+    return app
+
+def _override_auth(app):
+    """Swap the auth dependency for the static mock profile."""
+    from services.auth_service import get_current_user_profile
+    app.dependency_overrides[get_current_user_profile] = mock_get_current_user_profile
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def _app_client(_app):
+    """Single TestClient for the whole run; the per-test client fixtures only swap overrides."""
+    # Build the OpenAPI schema once; app.openapi() memoizes it on app.openapi_schema
+    _app.openapi()
+    # Not entered as a context manager: the endpoint tests don't need the
+    # lifespan, so the (mocked) poller startup is skipped entirely
+    test_client = TestClient(_app)
+    # Warm up routing and the client's transport before the first real test
+    test_client.get("/health")
+    return test_client
 
 @pytest.fixture
-def client():
+def client(_app, _app_client):
     """Create a FastAPI test client with mocked authentication."""
-    # Override the dependency before creating the test client
-    app.dependency_overrides[get_current_user_profile] = mock_get_current_user_profile
+    _override_auth(_app)
     
-    with TestClient(app) as test_client:
-        yield test_client
+    yield _app_client
     
     # Clean up the override after the test
-    app.dependency_overrides.clear()
+    _app.dependency_overrides.clear()
 
-@pytest.fixture
+@pytest_asyncio.fixture
+async def aclient(_app, _app_client):
+    """Async client calling the app directly in the test's event loop, with mocked authentication."""
+    # Skips TestClient's blocking portal thread hop; depends on _app_client for the one-off app warm-up
+    _override_auth(_app)
+    async with AsyncClient(transport=ASGITransport(app=_app), base_url="http://test") as async_client:
+        yield async_client
+    _app.dependency_overrides.clear()
+
+@pytest_asyncio.fixture
+async def unauthenticated_aclient(_app, _app_client):
+    """Async client calling the app directly in the test's event loop, without authentication."""
+    _app.dependency_overrides.clear()
+    async with AsyncClient(transport=ASGITransport(app=_app), base_url="http://test") as async_client:
+        yield async_client
+
+@pytest.fixture(scope="session")
 def mock_user_profile():
     """Mock user profile for testing authenticated endpoints."""
-    # Use the same consistent UUIDs as mock_get_current_user_profile
-    return {
-        "id": "12345678-1234-1234-1234-123456789012",
-        "user_id": "12345678-1234-1234-1234-123456789012",
-        "email": "test@example.com",
-        "supabase_user_id": "87654321-4321-4321-4321-210987654321",
-        "full_name": "Test User",
-        "created_at": datetime.now().isoformat()
-    }
+    # The same profile the client fixtures' auth override returns
+    return MOCK_USER_PROFILE
+
+@pytest.fixture(scope="session")
+def user_id(mock_user_profile):
+    """Database id of the mock user, for tests that only need the id."""
+    return mock_user_profile["id"]
 
 @pytest.fixture
-def client_with_user(mock_user_profile):
+def client_with_user(_app, _app_client):
     """Create a FastAPI test client with a specific user profile."""
-    def custom_get_current_user_profile():
-        return mock_user_profile
-    
-    # Override the dependency with the custom user profile
-    app.dependency_overrides[get_current_user_profile] = custom_get_current_user_profile
+    # The client itself is session-scoped; only the override is swapped per test, because
+    # client, client_with_user and unauthenticated_client share one app and its overrides dict
+    _override_auth(_app)
     
-    with TestClient(app) as test_client:
-        yield test_client
+    yield _app_client
     
     # Clean up the override after the test
-    app.dependency_overrides.clear()
+    _app.dependency_overrides.clear()
 
 @pytest.fixture
-def unauthenticated_client():
+def unauthenticated_client(_app, _app_client):
     """Create a FastAPI test client without authentication."""
     # Don't override the dependency - let it fail naturally
-    with TestClient(app) as test_client:
-        yield test_client
+    _app.dependency_overrides.clear()
+    yield _app_client
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_user_auth_data():
     """Mock user authentication data."""
     return UserAuthData(
         access_token="mock_access_token",
         refresh_token="mock_refresh_token",
         token_type="Bearer",
-        expires_at=int((datetime.now() + timedelta(hours=1)).timestamp()),
+        expires_at=_EXPIRES_AT,
         user={
             "id": str(uuid4()),
             "email": "test@example.com",
@@ -88,61 +131,145 @@ def mock_user_auth_data():
         }
     )
 
+@pytest.fixture(scope="session")
+def sample_user_auth_data():
+    """Factory-built UserAuthData shared by tests that only read it."""
+    return UserAuthDataFactory.build()
+
+@pytest.fixture(scope="session")
+def prompt_config():
+    """Generated prompt configuration shared by tests that only read it."""
+    return generate_prompt_config()
+
+@pytest.fixture(scope="session")
+def user_connections():
+    """Generated Gmail and Slack connections shared by tests that only read them."""
+    return generate_user_connections()
+
+def _spec_mock(spec):
+    """Build a mock specced against the real service, with its public attributes created."""
+    service = Mock(spec=spec)
+    # Create the method mocks up front so per-test attribute access hits existing children
+    for name in dir(spec):
+        if not name.startswith('_'):
+            getattr(service, name)
+    return service
+
+def _service_class_mocks(spec):
+    """Build a (service instance, service class) mock pair specced against the real service."""
+    service = _spec_mock(spec)
+    return service, Mock(return_value=service)
+
+def _reset_service_class_mocks(mocks):
+    service, service_class = mocks
+    service.reset_mock(return_value=True, side_effect=True)
+    # Keep the class wired to the shared instance
+    service_class.reset_mock()
+
+@pytest.fixture(scope="session")
+def _google_service_mocks():
+    from services.google_service import GoogleService
+    return _service_class_mocks(GoogleService)
+
+@pytest.fixture(scope="session")
+def _slack_service_mocks():
+    from services.slack_service import SlackService
+    return _service_class_mocks(SlackService)
+
 @pytest.fixture
-def mock_google_service():
-    """Mock Google service."""
-    with patch('services.google_service.GoogleService') as mock:
-        mock_instance = Mock()
-        mock.return_value = mock_instance
-        yield mock_instance
+def mock_google_service(monkeypatch, _google_service_mocks):
+    """Mock GoogleService as seen by the Gmail OAuth endpoints; yields (instance, class)."""
+    monkeypatch.setattr('apis.connect_gmail.GoogleService', _google_service_mocks[1])
+    yield _google_service_mocks
+    _reset_service_class_mocks(_google_service_mocks)
 
 @pytest.fixture
-def mock_slack_service():
-    """Mock Slack service."""
-    with patch('services.slack_service.SlackService') as mock:
-        mock_instance = Mock()
-        mock.return_value = mock_instance
-        yield mock_instance
+def mock_inbox_google_service(monkeypatch, _google_service_mocks):
+    """Mock GoogleService as seen by the inbox endpoints; yields (instance, class)."""
+    monkeypatch.setattr('apis.inbox.GoogleService', _google_service_mocks[1])
+    yield _google_service_mocks
+    _reset_service_class_mocks(_google_service_mocks)
+
+@pytest.fixture
+def mock_settings_google_service(monkeypatch, _google_service_mocks):
+    """Mock GoogleService as seen by the settings endpoints; yields (instance, class)."""
+    monkeypatch.setattr('apis.settings.GoogleService', _google_service_mocks[1])
+    yield _google_service_mocks
+    _reset_service_class_mocks(_google_service_mocks)
+
+@pytest.fixture
+def mock_slack_service(monkeypatch, _slack_service_mocks):
+    """Mock SlackService as seen by the Slack OAuth endpoints; yields (instance, class)."""
+    monkeypatch.setattr('apis.connect_slack.SlackService', _slack_service_mocks[1])
+    yield _slack_service_mocks
+    _reset_service_class_mocks(_slack_service_mocks)
+
+@pytest.fixture(scope="session")
+def _token_manager_mock():
+    from services.token_manager import TokenManager
+    return _spec_mock(TokenManager)
 
 @pytest.fixture
-def mock_auth_service():
+def mock_slack_token_manager(monkeypatch, _token_manager_mock):
+    """Mock the token manager as seen by the Slack API endpoints."""
+    monkeypatch.setattr('apis.slack_api.token_manager', _token_manager_mock)
+    yield _token_manager_mock
+    _token_manager_mock.reset_mock(return_value=True, side_effect=True)
+
+@pytest.fixture(scope="session")
+def _auth_service_patch():
+    """Auth service mock built once for the run; tests reset it rather than rebuilding it."""
+    return MagicMock()
+
+@pytest.fixture
+def mock_auth_service(mocker, _auth_service_patch):
     """Mock authentication service."""
-    with patch('apis.auth.auth_service') as mock:
-        yield mock
+    # Only installed for tests that ask for it
+    mocker.patch('apis.auth.auth_service', _auth_service_patch)
+    yield _auth_service_patch
+    _auth_service_patch.reset_mock(return_value=True, side_effect=True)
+
+@pytest.fixture(scope="session")
+def _user_prompt_service_mock():
+    from services.user_prompt_service import UserPromptService
+    return _spec_mock(UserPromptService)
 
 @pytest.fixture
-def mock_user_prompt_service():
-    """Mock user prompt service."""
-    with patch('services.user_prompt_service.user_prompt_service') as mock:
-        yield mock
+def mock_user_prompt_service(monkeypatch, _user_prompt_service_mock):
+    """Mock user prompt service as seen by the prompt settings endpoints."""
+    monkeypatch.setattr('apis.prompt_settings.user_prompt_service', _user_prompt_service_mock)
+    yield _user_prompt_service_mock
+    _user_prompt_service_mock.reset_mock(return_value=True, side_effect=True)
+
+@pytest.fixture(scope="session")
+def _connections_service_mock():
+    from services.connections_service import ConnectionsService
+    return _spec_mock(ConnectionsService)
 
 @pytest.fixture
-def mock_connections_service():
-    """Mock connections service."""
-    with patch('services.connections_service.connections_service') as mock:
-        yield mock
+def mock_connections_service(monkeypatch, _connections_service_mock):
+    """Mock connections service, both where settings imports it and for call-time imports."""
+    monkeypatch.setattr('apis.settings.connections_service', _connections_service_mock)
+    monkeypatch.setattr('services.connections_service.connections_service', _connections_service_mock)
+    yield _connections_service_mock
+    _connections_service_mock.reset_mock(return_value=True, side_effect=True)
 
 @pytest.fixture
-def mock_token_manager():
+def mock_token_manager(mocker):
     """Mock token manager."""
-    with patch('services.token_manager.token_manager') as mock:
-        yield mock
+    return mocker.patch('services.token_manager.token_manager')
 
 def mock_get_current_user_profile():
     """Mock function to replace get_current_user_profile dependency."""
-    # Use consistent UUIDs for testing
-    return {
-        "id": "12345678-1234-1234-1234-123456789012",
-        "user_id": "12345678-1234-1234-1234-123456789012",
-        "email": "test@example.com",
-        "supabase_user_id": "87654321-4321-4321-4321-210987654321",
-        "full_name": "Test User",
-        "created_at": datetime.now().isoformat()
-    }
-
-@pytest.fixture(autouse=True)
-def mock_environment_variables():
-    """Mock environment variables for testing."""
+    return MOCK_USER_PROFILE
+
+@pytest.fixture(scope="session", autouse=True)
+def _test_env():
+    """Mock environment variables and the email poller once for the whole run."""
+    mock_service = Mock()
+    # AsyncMock returns a fresh awaitable on every call
+    mock_service.start_polling_all_users = AsyncMock(return_value=None)
+    mock_service.stop = Mock(return_value=None)
     with patch.dict(os.environ, {
         'FRONTEND_URL': 'http://localhost:5173',
         'SUPABASE_URL': 'http://localhost:54321',
@@ -153,17 +280,11 @@ def mock_environment_variables():
         'SLACK_CLIENT_ID': 'mock_slack_client_id',
         'SLACK_CLIENT_SECRET': 'mock_slack_client_secret',
         'OPENAI_API_KEY': 'mock_openai_api_key'
-    }):
-        yield
-
-@pytest.fixture(autouse=True)
-def mock_email_polling_service():
-    """Mock email polling service to prevent real background tasks during tests."""
-    with patch('main.email_polling_service') as mock_service:
-        # Create a proper async mock coroutine
-        async def mock_start_polling():
-            return None
-        
-        mock_service.start_polling_all_users = Mock(return_value=mock_start_polling())
-        mock_service.stop = Mock(return_value=None)
-        yield mock_service 
\ No newline at end of file
+    }), patch('main.email_polling_service', mock_service):
+        yield mock_service
+
+@pytest.fixture
+def mock_email_polling_service(_test_env):
+    """The session's mocked email poller, with call history cleared for the test."""
+    _test_env.reset_mock()
+    return _test_env
@@ -1,129 +1,176 @@
 """Factory classes for generating test data."""
 
 import factory
+import functools
 from datetime import datetime, timedelta
 from uuid import uuid4
-from faker import Faker
 from models import UserAuthData, EmailDetails, User, Connection, Email, OAuthToken, ConnectionProvider, ConnectionStatus
 
-fake = Faker()
+@functools.lru_cache(maxsize=1)
+def _fake():
+    """Import and build Faker on first use; most factory fields no longer need it."""
+    from faker import Faker
+    return Faker()
+
+# Nothing here is persisted, so every factory uses the build strategy and skips _create
+
+# Fixed base for generated timestamps; sequences offset from it so builds stay deterministic
+_EPOCH = datetime(2024, 1, 1)
+
+DEFAULT_LABELS = ["INBOX", "UNREAD"]
 
 class UserAuthDataFactory(factory.Factory):
     class Meta:
         model = UserAuthData
+        strategy = factory.BUILD_STRATEGY
     
-    access_token = factory.LazyFunction(lambda: f"mock_access_token_{fake.uuid4()}")
-    refresh_token = factory.LazyFunction(lambda: f"mock_refresh_token_{fake.uuid4()}")
+    access_token = factory.Sequence(lambda n: f"mock_access_token_{n}")
+    refresh_token = factory.Sequence(lambda n: f"mock_refresh_token_{n}")
     token_type = "Bearer"
     expires_at = factory.LazyFunction(lambda: int((datetime.now() + timedelta(hours=1)).timestamp()))
-    user = factory.LazyFunction(lambda: {
+    user = factory.Sequence(lambda n: {
         "id": str(uuid4()),
-        "email": fake.email(),
+        "email": f"user{n}@example.com",
         "user_metadata": {
-            "full_name": fake.name()
+            "full_name": f"Test User {n}"
         }
     })
 
 class EmailDetailsFactory(factory.Factory):
     class Meta:
         model = EmailDetails
+        strategy = factory.BUILD_STRATEGY
     
-    id = factory.LazyFunction(lambda: fake.uuid4())
-    thread_id = factory.LazyFunction(lambda: fake.uuid4())
-    subject = factory.LazyFunction(lambda: fake.sentence())
-    from_email = factory.LazyFunction(lambda: fake.email())
-    to_email = factory.LazyFunction(lambda: fake.email())
-    date = factory.LazyFunction(lambda: fake.date_time().isoformat())
-    snippet = factory.LazyFunction(lambda: fake.text(max_nb_chars=200))
-    body = factory.LazyFunction(lambda: {
-        "text": fake.text(),
-        "html": f"<p>{fake.text()}</p>"
+    class Params:
+        # Opt in with EmailDetailsFactory.build(realistic=True) when a test needs Faker text
+        realistic = factory.Trait(
+            subject=factory.LazyFunction(lambda: _fake().sentence()),
+            snippet=factory.LazyFunction(lambda: _fake().text(max_nb_chars=200)),
+            body=factory.LazyFunction(lambda: {
+                "text": _fake().text(),
+                "html": f"<p>{_fake().text()}</p>"
+            })
+        )
+    
+    id = factory.Sequence(lambda n: f"msg_{n}")
+    thread_id = factory.Sequence(lambda n: f"thread_{n}")
+    subject = factory.Sequence(lambda n: f"Test subject {n}")
+    from_email = factory.Sequence(lambda n: f"sender{n}@example.com")
+    to_email = factory.Sequence(lambda n: f"recipient{n}@example.com")
+    date = factory.Sequence(lambda n: (_EPOCH + timedelta(minutes=n)).isoformat())
+    snippet = factory.Sequence(lambda n: f"Test snippet {n}")
+    body = factory.Sequence(lambda n: {
+        "text": f"Test body {n}",
+        "html": f"<p>Test body {n}</p>"
     })
-    labels = factory.LazyFunction(lambda: ["INBOX", "UNREAD"])
+    # EmailDetails is a plain dataclass that keeps the list it is given, so build a fresh one per instance
+    labels = factory.LazyFunction(lambda: list(DEFAULT_LABELS))
     has_attachments = False
-    size_estimate = factory.LazyFunction(lambda: fake.random_int(min=100, max=50000))
-    cc_email = factory.LazyFunction(lambda: fake.email() if fake.boolean() else None)
+    size_estimate = factory.Sequence(lambda n: 1000 + n)
+    cc_email = factory.Sequence(lambda n: f"cc{n}@example.com" if n % 2 else None)
     bcc_email = None
 
 class UserFactory(factory.Factory):
     class Meta:
         model = User
+        strategy = factory.BUILD_STRATEGY
+    
+    class Params:
+        realistic = factory.Trait(
+            full_name=factory.LazyFunction(lambda: _fake().name()),
+            avatar_url=factory.LazyFunction(lambda: _fake().image_url())
+        )
     
     id = factory.LazyFunction(uuid4)
     supabase_user_id = factory.LazyFunction(lambda: str(uuid4()))
-    email = factory.LazyFunction(lambda: fake.email())
-    created_at = factory.LazyFunction(lambda: fake.date_time())
+    email = factory.Sequence(lambda n: f"user{n}@example.com")
+    created_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
     business_id = factory.LazyFunction(uuid4)
-    full_name = factory.LazyFunction(lambda: fake.name())
-    avatar_url = factory.LazyFunction(lambda: fake.image_url())
-    last_sign_in_at = factory.LazyFunction(lambda: fake.date_time())
+    full_name = factory.Sequence(lambda n: f"Test User {n}")
+    avatar_url = factory.Sequence(lambda n: f"https://example.com/avatars/{n}.png")
+    last_sign_in_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
 
 class ConnectionFactory(factory.Factory):
     class Meta:
         model = Connection
+        strategy = factory.BUILD_STRATEGY
     
     id = factory.LazyFunction(uuid4)
     user_id = factory.LazyFunction(uuid4)
     connection_provider = ConnectionProvider.GMAIL
     status = ConnectionStatus.CONNECTED
     oauth_token_id = factory.LazyFunction(uuid4)
-    created_at = factory.LazyFunction(lambda: fake.date_time())
-    updated_at = factory.LazyFunction(lambda: fake.date_time())
-    last_sync_at = factory.LazyFunction(lambda: fake.date_time())
-    metadata = factory.LazyFunction(lambda: {"provider_user_id": fake.uuid4()})
+    created_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
+    updated_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
+    last_sync_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
+    metadata = factory.Sequence(lambda n: {"provider_user_id": f"provider_user_{n}"})
 
 class OAuthTokenFactory(factory.Factory):
     class Meta:
         model = OAuthToken
+        strategy = factory.BUILD_STRATEGY
     
     id = factory.LazyFunction(uuid4)
     provider = "google"
-    access_token = factory.LazyFunction(lambda: f"ya29.{fake.uuid4()}")
-    refresh_token = factory.LazyFunction(lambda: f"1//{fake.uuid4()}")
+    access_token = factory.Sequence(lambda n: f"ya29.mock_access_token_{n}")
+    refresh_token = factory.Sequence(lambda n: f"1//mock_refresh_token_{n}")
     token_type = "Bearer"
-    expires_at = factory.LazyFunction(lambda: fake.date_time() + timedelta(hours=1))
+    expires_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n, hours=1))
     scope = "https://www.googleapis.com/auth/gmail.readonly"
-    created_at = factory.LazyFunction(lambda: fake.date_time())
-    updated_at = factory.LazyFunction(lambda: fake.date_time())
+    created_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
+    updated_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
 
 class EmailFactory(factory.Factory):
     class Meta:
         model = Email
+        strategy = factory.BUILD_STRATEGY
+    
+    class Params:
+        # Opt in with EmailFactory.build(realistic=True) when a test needs Faker text
+        realistic = factory.Trait(
+            subject=factory.LazyFunction(lambda: _fake().sentence()),
+            snippet=factory.LazyFunction(lambda: _fake().text(max_nb_chars=200)),
+            body_text=factory.LazyFunction(lambda: _fake().text()),
+            body_html=factory.LazyFunction(lambda: f"<p>{_fake().text()}</p>")
+        )
     
     id = factory.LazyFunction(uuid4)
     user_id = factory.LazyFunction(uuid4)
-    gmail_id = factory.LazyFunction(lambda: fake.uuid4())
-    thread_id = factory.LazyFunction(lambda: fake.uuid4())
-    subject = factory.LazyFunction(lambda: fake.sentence())
-    from_email = factory.LazyFunction(lambda: fake.email())
-    to_email = factory.LazyFunction(lambda: fake.email())
-    cc_email = factory.LazyFunction(lambda: fake.email() if fake.boolean() else None)
+    gmail_id = factory.Sequence(lambda n: f"msg_{n}")
+    thread_id = factory.Sequence(lambda n: f"thread_{n}")
+    subject = factory.Sequence(lambda n: f"Test subject {n}")
+    from_email = factory.Sequence(lambda n: f"sender{n}@example.com")
+    to_email = factory.Sequence(lambda n: f"recipient{n}@example.com")
+    cc_email = factory.Sequence(lambda n: f"cc{n}@example.com" if n % 2 else None)
     bcc_email = None
-    reply_to = factory.LazyFunction(lambda: fake.email())
-    date_sent = factory.LazyFunction(lambda: fake.date_time())
-    snippet = factory.LazyFunction(lambda: fake.text(max_nb_chars=200))
-    body_text = factory.LazyFunction(lambda: fake.text())
-    body_html = factory.LazyFunction(lambda: f"<p>{fake.text()}</p>")
-    labels = factory.LazyFunction(lambda: ["INBOX", "UNREAD"])
+    reply_to = factory.Sequence(lambda n: f"sender{n}@example.com")
+    date_sent = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
+    snippet = factory.Sequence(lambda n: f"Test snippet {n}")
+    body_text = factory.Sequence(lambda n: f"Test body {n}")
+    body_html = factory.Sequence(lambda n: f"<p>Test body {n}</p>")
+    # Pydantic copies list fields on validation, so the shared constant is safe here
+    labels = DEFAULT_LABELS
     has_attachments = False
-    size_estimate = factory.LazyFunction(lambda: fake.random_int(min=100, max=50000))
+    size_estimate = factory.Sequence(lambda n: 1000 + n)
     is_processed = False
     processed_at = None
-    category = factory.LazyFunction(lambda: fake.random_element(elements=("financial", "business", "personal", "promotion")))
-    category_confidence = factory.LazyFunction(lambda: fake.pyfloat(min_value=0.0, max_value=1.0))
-    categorized_at = factory.LazyFunction(lambda: fake.date_time())
+    category = factory.Iterator(("financial", "business", "personal", "promotion"))
+    category_confidence = factory.Sequence(lambda n: (n % 100) / 100)
+    categorized_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
     category_prompt_version = "1.0"
-    created_at = factory.LazyFunction(lambda: fake.date_time())
-    updated_at = factory.LazyFunction(lambda: fake.date_time())
+    created_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
+    updated_at = factory.Sequence(lambda n: _EPOCH + timedelta(minutes=n))
 
 # Mock data generators for API responses
+# Memoized per email_count, so callers share one dict; copy it before mutating
+@functools.lru_cache(maxsize=None)
 def generate_gmail_thread(email_count: int = 3):
     """Generate a mock Gmail thread with multiple emails."""
-    thread_id = fake.uuid4()
+    thread_id = _fake().uuid4()
     emails = []
     
     for i in range(email_count):
-        email = EmailDetailsFactory().to_dict()
+        email = EmailDetailsFactory.build().to_dict()
         email['thread_id'] = thread_id
         if i > 0:
             email['subject'] = f"Re: {emails[0]['subject']}"
@@ -135,18 +182,18 @@ def generate_gmail_thread(email_count: int = 3):
         "email_count": email_count,
         "participants": list(set([email['from'] for email in emails] + [email['to'] for email in emails])),
         "latest_date": max(email['date'] for email in emails),
-        "has_unread": fake.boolean(),
+        "has_unread": _fake().boolean(),
         "subject": emails[0]['subject']
     }
 
 def generate_slack_user_info():
     """Generate mock Slack user info response."""
     return {
-        "user_id": fake.uuid4(),
-        "user": fake.user_name(),
-        "team_id": fake.uuid4(),
-        "team": fake.company(),
-        "url": f"https://{fake.domain_name()}.slack.com/"
+        "user_id": _fake().uuid4(),
+        "user": _fake().user_name(),
+        "team_id": _fake().uuid4(),
+        "team": _fake().company(),
+        "url": f"https://{_fake().domain_name()}.slack.com/"
     }
 
 def generate_slack_channels(count: int = 5):
@@ -154,14 +201,14 @@ def generate_slack_channels(count: int = 5):
     channels = []
     for _ in range(count):
         channels.append({
-            "id": fake.uuid4(),
-            "name": fake.word(),
+            "id": _fake().uuid4(),
+            "name": _fake().word(),
             "is_channel": True,
-            "is_private": fake.boolean(),
-            "is_member": fake.boolean(),
-            "num_members": fake.random_int(min=1, max=50),
-            "purpose": fake.sentence(),
-            "topic": fake.sentence()
+            "is_private": _fake().boolean(),
+            "is_member": _fake().boolean(),
+            "num_members": _fake().random_int(min=1, max=50),
+            "purpose": _fake().sentence(),
+            "topic": _fake().sentence()
         })
     return channels
 
@@ -172,21 +219,21 @@ def generate_user_connections():
             "id": str(uuid4()),
             "provider": "gmail",
             "status": "connected",
-            "connected_at": fake.date_time().isoformat(),
-            "last_sync_at": fake.date_time().isoformat(),
+            "connected_at": _fake().date_time().isoformat(),
+            "last_sync_at": _fake().date_time().isoformat(),
             "metadata": {
-                "email": fake.email()
+                "email": _fake().email()
             }
         },
         {
             "id": str(uuid4()),
             "provider": "slack",
             "status": "connected",
-            "connected_at": fake.date_time().isoformat(),
-            "last_sync_at": fake.date_time().isoformat(),
+            "connected_at": _fake().date_time().isoformat(),
+            "last_sync_at": _fake().date_time().isoformat(),
             "metadata": {
-                "team_name": fake.company(),
-                "user_name": fake.user_name()
+                "team_name": _fake().company(),
+                "user_name": _fake().user_name()
             }
         }
     ]
@@ -201,6 +248,6 @@ def generate_prompt_config():
         "temperature": 0.1,
         "max_tokens": 200,
         "timeout": 10,
-        "created_at": fake.date_time().isoformat(),
-        "updated_at": fake.date_time().isoformat()
+        "created_at": _fake().date_time().isoformat(),
+        "updated_at": _fake().date_time().isoformat()
     } 
\ No newline at end of file
@@ -3,17 +3,29 @@
 import pytest
 from fastapi import HTTPException
 from unittest.mock import Mock, patch
-from tests.factories import UserAuthDataFactory
+from types import SimpleNamespace
 from models import UserAuthData
 
+# Canned service result for endpoints that only serialize it back to JSON
+_CANNED_AUTH_DICT = {
+    "access_token": "mock_access_token",
+    "refresh_token": "mock_refresh_token",
+    "token_type": "Bearer",
+    "expires_at": 1735689600,
+    "user": {
+        "id": "12345678-1234-1234-1234-123456789012",
+        "email": "test@example.com",
+        "user_metadata": {"full_name": "Test User"}
+    }
+}
+
 class TestAuthAPI:
     """Test authentication API endpoints."""
 
     def test_login_success(self, unauthenticated_client, mock_auth_service):
         """Test successful login."""
         # Setup mock
-        mock_auth_data = UserAuthDataFactory()
-        mock_auth_service.login_with_email_password.return_value = mock_auth_data
+        mock_auth_service.login_with_email_password.return_value = SimpleNamespace(**_CANNED_AUTH_DICT)
 
         # Make request
         response = unauthenticated_client.post("/auth/login", json={
@@ -23,13 +35,13 @@ class TestAuthAPI:
 
         # Assertions
         assert response.status_code == 200
-        data = response.json()
-        assert "access_token" in data
-        assert "refresh_token" in data
-        assert "token_type" in data
-        assert "expires_at" in data
-        assert "user" in data
-        assert data["token_type"] == "Bearer"
+        body = response.content
+        assert b'"access_token"' in body
+        assert b'"refresh_token"' in body
+        assert b'"token_type"' in body
+        assert b'"expires_at"' in body
+        assert b'"user"' in body
+        assert response.json()["token_type"] == "Bearer"
 
         # Verify service was called
         mock_auth_service.login_with_email_password.assert_called_once_with(
@@ -37,74 +49,52 @@ class TestAuthAPI:
             password="password123"
         )
 
-    def test_login_invalid_email(self, unauthenticated_client):
-        """Test login with invalid email format."""
-        response = unauthenticated_client.post("/auth/login", json={
-            "email": "invalid-email",
-            "password": "password123"
-        })
-
-        assert response.status_code == 422
-        data = response.json()
-        assert "detail" in data
-
-    def test_login_missing_fields(self, unauthenticated_client):
-        """Test login with missing required fields."""
-        response = unauthenticated_client.post("/auth/login", json={
-            "email": "test@example.com"
-            # Missing password
-        })
-
-        assert response.status_code == 422
-
-    def test_login_authentication_failure(self, unauthenticated_client, mock_auth_service):
-        """Test login with invalid credentials."""
-        # Setup mock to raise HTTPException
-        mock_auth_service.login_with_email_password.side_effect = HTTPException(
-            status_code=401,
-            detail="Invalid email or password"
-        )
-
-        response = unauthenticated_client.post("/auth/login", json={
-            "email": "test@example.com",
-            "password": "wrong_password"
-        })
-
-        assert response.status_code == 401
-        data = response.json()
-        assert data["detail"] == "Invalid email or password"
-
-    def test_login_internal_server_error(self, unauthenticated_client, mock_auth_service):
-        """Test login with internal server error."""
-        # Setup mock to raise generic exception
-        mock_auth_service.login_with_email_password.side_effect = Exception("Database error")
-
-        response = unauthenticated_client.post("/auth/login", json={
-            "email": "test@example.com",
-            "password": "password123"
-        })
-
-        assert response.status_code == 500
-        data = response.json()
-        assert data["detail"] == "Internal server error during login"
+    @pytest.mark.parametrize("endpoint,payload,method,exc,expected_status,expected_detail", [
+        pytest.param("/auth/login", {"email": "invalid-email", "password": "password123"},
+                     None, None, 422, None, id="login_invalid_email"),
+        pytest.param("/auth/login", {"email": "test@example.com"},  # Missing password
+                     None, None, 422, None, id="login_missing_fields"),
+        pytest.param("/auth/login", {"email": "test@example.com", "password": "wrong_password"},
+                     "login_with_email_password", HTTPException(status_code=401, detail="Invalid email or password"),
+                     401, "Invalid email or password", id="login_authentication_failure"),
+        pytest.param("/auth/login", {"email": "test@example.com", "password": "password123"},
+                     "login_with_email_password", Exception("Database error"),
+                     500, "Internal server error during login", id="login_internal_server_error"),
+        pytest.param("/auth/refresh", {},
+                     None, None, 422, None, id="refresh_token_missing_token"),
+        pytest.param("/auth/logout", None,
+                     "logout", HTTPException(status_code=400, detail="Logout failed"),
+                     400, "Logout failed", id="logout_http_exception"),
+    ])
+    def test_auth_endpoint_errors(self, unauthenticated_client, mock_auth_service,
+                                  endpoint, payload, method, exc, expected_status, expected_detail):
+        """Test auth endpoints reject bad input and surface service errors."""
+        if method:
+            getattr(mock_auth_service, method).side_effect = exc
+
+        response = unauthenticated_client.post(endpoint, json=payload)
+
+        assert response.status_code == expected_status
+        assert b'"detail"' in response.content
+        if expected_detail is not None:
+            assert response.json()["detail"] == expected_detail
 
     def test_refresh_token_success(self, unauthenticated_client, mock_auth_service):
         """Test successful token refresh."""
         # Setup mock
-        mock_auth_data = UserAuthDataFactory()
-        mock_auth_service.refresh_token.return_value = mock_auth_data
+        mock_auth_service.refresh_token.return_value = SimpleNamespace(**_CANNED_AUTH_DICT)
 
         response = unauthenticated_client.post("/auth/refresh", json={
             "refresh_token": "valid_refresh_token"
         })
 
         assert response.status_code == 200
-        data = response.json()
-        assert "access_token" in data
-        assert "refresh_token" in data
-        assert "token_type" in data
-        assert "expires_at" in data
-        assert "user" in data
+        body = response.content
+        assert b'"access_token"' in body
+        assert b'"refresh_token"' in body
+        assert b'"token_type"' in body
+        assert b'"expires_at"' in body
+        assert b'"user"' in body
 
         mock_auth_service.refresh_token.assert_called_once_with("valid_refresh_token")
 
@@ -123,12 +113,6 @@ class TestAuthAPI:
         data = response.json()
         assert data["detail"] == "Invalid refresh token"
 
-    def test_refresh_token_missing_token(self, unauthenticated_client):
-        """Test token refresh with missing refresh token."""
-        response = unauthenticated_client.post("/auth/refresh", json={})
-
-        assert response.status_code == 422
-
     def test_refresh_token_internal_error(self, unauthenticated_client, mock_auth_service):
         """Test token refresh with internal server error."""
         mock_auth_service.refresh_token.side_effect = Exception("Service unavailable")
@@ -148,24 +132,10 @@ class TestAuthAPI:
         response = unauthenticated_client.post("/auth/logout")
 
         assert response.status_code == 200
-        data = response.json()
-        assert "message" in data
+        assert b'"message"' in response.content
 
         mock_auth_service.logout.assert_called_once_with(token="")
 
-    def test_logout_http_exception(self, unauthenticated_client, mock_auth_service):
-        """Test logout with HTTP exception."""
-        mock_auth_service.logout.side_effect = HTTPException(
-            status_code=400,
-            detail="Logout failed"
-        )
-
-        response = unauthenticated_client.post("/auth/logout")
-
-        assert response.status_code == 400
-        data = response.json()
-        assert data["detail"] == "Logout failed"
-
     def test_logout_internal_error(self, unauthenticated_client, mock_auth_service):
         """Test logout with internal server error."""
         mock_auth_service.logout.side_effect = Exception("Database error")
@@ -199,9 +169,9 @@ class TestAuthAPI:
         response = client.get("/auth/me")
 
         assert response.status_code == 200
-        data = response.json()
-        assert "id" in data
-        assert "email" in data
+        body = response.content
+        assert b'"id"' in body
+        assert b'"email"' in body
 
     def test_auth_health_check(self, unauthenticated_client):
         """Test authentication service health check."""
@@ -211,62 +181,3 @@ class TestAuthAPI:
         data = response.json()
         assert data["status"] == "healthy"
         assert data["service"] == "authentication"
-
-class TestLoginResponse:
-    """Test LoginResponse model."""
-
-    def test_from_user_auth_data(self):
-        """Test creating LoginResponse from UserAuthData."""
-        from apis.auth import LoginResponse
-        
-        mock_auth_data = UserAuthDataFactory()
-        
-        response = LoginResponse.from_user_auth_data(mock_auth_data)
-        
-        assert response.access_token == mock_auth_data.access_token
-        assert response.refresh_token == mock_auth_data.refresh_token
-        assert response.token_type == mock_auth_data.token_type
-        assert response.expires_at == mock_auth_data.expires_at
-        assert response.user == mock_auth_data.user
-
-class TestRequestModels:
-    """Test request/response models validation."""
-
-    def test_login_request_valid(self):
-        """Test valid login request."""
-        from apis.auth import LoginRequest
-        
-        request = LoginRequest(
-            email="test@example.com",
-            password="password123"
-        )
-        
-        assert request.email == "test@example.com"
-        assert request.password == "password123"
-
-    def test_login_request_invalid_email(self):
-        """Test login request with invalid email."""
-        from apis.auth import LoginRequest
-        from pydantic import ValidationError
-        
-        with pytest.raises(ValidationError):
-            LoginRequest(
-                email="invalid-email",
-                password="password123"
-            )
-
-    def test_refresh_token_request_valid(self):
-        """Test valid refresh token request."""
-        from apis.auth import RefreshTokenRequest
-        
-        request = RefreshTokenRequest(refresh_token="valid_token")
-        
-        assert request.refresh_token == "valid_token"
-
-    def test_refresh_token_request_missing_token(self):
-        """Test refresh token request with missing token."""
-        from apis.auth import RefreshTokenRequest
-        from pydantic import ValidationError
-        
-        with pytest.raises(ValidationError):
-            RefreshTokenRequest() 
\ No newline at end of file
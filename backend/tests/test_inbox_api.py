@@ -2,26 +2,36 @@
 
 import pytest
 from fastapi import HTTPException
-from unittest.mock import Mock, patch
+from pydantic import ValidationError
+from apis.inbox import EmailReplyRequest
 from tests.factories import generate_gmail_thread, EmailDetailsFactory, EmailFactory
 
+# Payloads built once at import; the endpoints only serialize them back, so tests share them
+_SAMPLE_THREADS = [
+    generate_gmail_thread(email_count=3),
+    generate_gmail_thread(email_count=2),
+    generate_gmail_thread(email_count=1)
+]
+_SAMPLE_EMAILS = [EmailFactory.build().model_dump() for _ in range(3)]
+_SAMPLE_EMAIL_DETAILS = [EmailDetailsFactory.build().to_dict() for _ in range(5)]
+
+_EMAIL_ID = "test_email_id"
+_THREAD_ID = "test_thread_id"
+_EMAIL_URL = f"/inbox/email/{_EMAIL_ID}"
+_EMAIL_READ_URL = f"{_EMAIL_URL}/read"
+_EMAIL_REPLY_URL = f"{_EMAIL_URL}/reply"
+_THREAD_URL = f"/inbox/thread/{_THREAD_ID}"
+_THREAD_READ_URL = f"{_THREAD_URL}/read"
+
 class TestInboxAPI:
     """Test inbox API endpoints."""
 
-    @patch('apis.inbox.GoogleService')
-    def test_get_inbox_success(self, mock_google_service_class, client_with_user, mock_user_profile):
+    def test_get_inbox_success(self, client_with_user, mock_user_profile, mock_inbox_google_service):
         """Test successful inbox retrieval."""
         # Setup mocks
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service, mock_google_service_class = mock_inbox_google_service
         
-        # Create mock threads
-        mock_threads = [
-            generate_gmail_thread(email_count=3),
-            generate_gmail_thread(email_count=2),
-            generate_gmail_thread(email_count=1)
-        ]
-        mock_google_service.get_inbox_threads.return_value = mock_threads
+        mock_google_service.get_inbox_threads.return_value = _SAMPLE_THREADS
 
         # Make request
         response = client_with_user.get("/inbox/")
@@ -29,12 +39,7 @@ class TestInboxAPI:
         # Assertions
         assert response.status_code == 200
         data = response.json()
-        assert "threads" in data
-        assert "thread_count" in data
-        assert "total_emails" in data
-        assert "limit" in data
-        assert "offset" in data
-        assert "source" in data
+        assert {"threads", "thread_count", "total_emails", "limit", "offset", "source"} <= data.keys()
         
         assert data["thread_count"] == 3
         assert data["total_emails"] == 6  # 3 + 2 + 1
@@ -46,16 +51,12 @@ class TestInboxAPI:
         mock_google_service_class.assert_called_once_with(internal_user_id=mock_user_profile["user_id"])
         mock_google_service.get_inbox_threads.assert_called_once_with(limit=50, offset=0)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_get_inbox_with_pagination(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_get_inbox_with_pagination(self, client_with_user, mock_inbox_google_service):
         """Test inbox retrieval with pagination parameters."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.get_inbox_threads.return_value = []
 
-        response = client.get("/inbox/?limit=10&offset=20")
+        response = client_with_user.get("/inbox/?limit=10&offset=20")
 
         assert response.status_code == 200
         data = response.json()
@@ -64,27 +65,17 @@ class TestInboxAPI:
         
         mock_google_service.get_inbox_threads.assert_called_once_with(limit=10, offset=20)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_get_emails_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_get_emails_success(self, client_with_user, mock_inbox_google_service):
         """Test successful individual emails retrieval."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         
-        # Create mock emails
-        mock_emails = [EmailFactory().model_dump() for _ in range(3)]
-        mock_google_service.get_inbox_emails.return_value = mock_emails
+        mock_google_service.get_inbox_emails.return_value = _SAMPLE_EMAILS
 
-        response = client.get("/inbox/emails")
+        response = client_with_user.get("/inbox/emails")
 
         assert response.status_code == 200
         data = response.json()
-        assert "emails" in data
-        assert "count" in data
-        assert "limit" in data
-        assert "offset" in data
-        assert "source" in data
+        assert {"emails", "count", "limit", "offset", "source"} <= data.keys()
         
         assert data["count"] == 3
         assert data["limit"] == 50
@@ -93,25 +84,17 @@ class TestInboxAPI:
         
         mock_google_service.get_inbox_emails.assert_called_once_with(limit=50, offset=0)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_sync_emails_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_sync_emails_success(self, client_with_user, mock_inbox_google_service):
         """Test successful email sync."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         
-        # Mock fetched emails
-        mock_emails = [EmailDetailsFactory().to_dict() for _ in range(5)]
-        mock_google_service.fetch_gmail_emails.return_value = mock_emails
+        mock_google_service.fetch_gmail_emails.return_value = _SAMPLE_EMAIL_DETAILS
 
-        response = client.post("/inbox/emails/sync")
+        response = client_with_user.post("/inbox/emails/sync")
 
         assert response.status_code == 200
         data = response.json()
-        assert "message" in data
-        assert "emails_synced" in data
-        assert "source" in data
+        assert {"message", "emails_synced", "source"} <= data.keys()
         
         assert data["emails_synced"] == 5
         assert data["source"] == "gmail_api"
@@ -119,221 +102,146 @@ class TestInboxAPI:
         
         mock_google_service.fetch_gmail_emails.assert_called_once_with(max_results=50, only_new=True)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_sync_emails_with_custom_max_results(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_sync_emails_with_custom_max_results(self, client_with_user, mock_inbox_google_service):
         """Test email sync with custom max results."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.fetch_gmail_emails.return_value = []
 
-        response = client.post("/inbox/emails/sync?max_results=100")
+        response = client_with_user.post("/inbox/emails/sync?max_results=100")
 
         assert response.status_code == 200
         mock_google_service.fetch_gmail_emails.assert_called_once_with(max_results=100, only_new=True)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_mark_email_as_read_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_mark_email_as_read_success(self, client_with_user, mock_inbox_google_service):
         """Test successfully marking an email as read."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.mark_email_as_read.return_value = True
 
-        email_id = "test_email_id"
-        response = client.put(f"/inbox/email/{email_id}/read")
+        response = client_with_user.put(_EMAIL_READ_URL)
 
         assert response.status_code == 200
         data = response.json()
         assert data["message"] == "Email marked as read"
-        assert data["email_id"] == email_id
+        assert data["email_id"] == _EMAIL_ID
         
-        mock_google_service.mark_email_as_read.assert_called_once_with(email_id)
+        mock_google_service.mark_email_as_read.assert_called_once_with(_EMAIL_ID)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_mark_email_as_read_not_found(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_mark_email_as_read_not_found(self, client_with_user, mock_inbox_google_service):
         """Test marking non-existent email as read."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.mark_email_as_read.return_value = False
 
-        response = client.put("/inbox/email/nonexistent_id/read")
+        response = client_with_user.put("/inbox/email/nonexistent_id/read")
 
         assert response.status_code == 404
         data = response.json()
         assert data["detail"] == "Email not found"
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_mark_thread_as_read_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_mark_thread_as_read_success(self, client_with_user, mock_inbox_google_service):
         """Test successfully marking a thread as read."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.mark_thread_as_read.return_value = 3
 
-        thread_id = "test_thread_id"
-        response = client.put(f"/inbox/thread/{thread_id}/read")
+        response = client_with_user.put(_THREAD_READ_URL)
 
         assert response.status_code == 200
         data = response.json()
         assert data["message"] == "Marked 3 emails as read in thread"
-        assert data["thread_id"] == thread_id
+        assert data["thread_id"] == _THREAD_ID
         
-        mock_google_service.mark_thread_as_read.assert_called_once_with(thread_id)
+        mock_google_service.mark_thread_as_read.assert_called_once_with(_THREAD_ID)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_get_single_email_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_get_single_email_success(self, client_with_user, mock_inbox_google_service):
         """Test successfully retrieving a single email."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         
-        mock_email = EmailFactory().model_dump()
+        mock_email = _SAMPLE_EMAILS[0]
         mock_google_service.get_single_email_from_db.return_value = mock_email
 
-        email_id = "test_email_id"
-        response = client.get(f"/inbox/email/{email_id}")
+        response = client_with_user.get(_EMAIL_URL)
 
         assert response.status_code == 200
         data = response.json()
         assert data["id"] == str(mock_email["id"])  # Convert UUID to string for comparison
         assert data["subject"] == mock_email["subject"]
         
-        mock_google_service.get_single_email_from_db.assert_called_once_with(email_id)
+        mock_google_service.get_single_email_from_db.assert_called_once_with(_EMAIL_ID)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_get_single_email_not_found(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_get_single_email_not_found(self, client_with_user, mock_inbox_google_service):
         """Test retrieving non-existent email."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.get_single_email_from_db.return_value = None
 
-        response = client.get("/inbox/email/nonexistent_id")
+        response = client_with_user.get("/inbox/email/nonexistent_id")
 
         assert response.status_code == 404
-        data = response.json()
-        assert "not found" in data["detail"]
+        assert b"not found" in response.content
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_get_thread_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_get_thread_success(self, client_with_user, mock_inbox_google_service):
         """Test successfully retrieving a thread."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         
-        mock_thread = generate_gmail_thread(email_count=3)
+        mock_thread = _SAMPLE_THREADS[0]
         mock_google_service.get_thread_by_id.return_value = mock_thread
 
-        thread_id = "test_thread_id"
-        response = client.get(f"/inbox/thread/{thread_id}")
+        response = client_with_user.get(_THREAD_URL)
 
         assert response.status_code == 200
         data = response.json()
         assert data["thread_id"] == mock_thread["thread_id"]
         assert data["email_count"] == mock_thread["email_count"]
         
-        mock_google_service.get_thread_by_id.assert_called_once_with(thread_id)
+        mock_google_service.get_thread_by_id.assert_called_once_with(_THREAD_ID)
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_get_thread_not_found(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_get_thread_not_found(self, client_with_user, mock_inbox_google_service):
         """Test retrieving non-existent thread."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.get_thread_by_id.return_value = None
 
-        response = client.get("/inbox/thread/nonexistent_id")
+        response = client_with_user.get("/inbox/thread/nonexistent_id")
 
         assert response.status_code == 404
-        data = response.json()
-        assert "not found" in data["detail"]
-
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_reply_to_email_success(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
-        """Test successfully replying to an email."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        assert b"not found" in response.content
+
+    @pytest.mark.parametrize("reply_data,expected_call", [
+        pytest.param(
+            {"reply_body": "Thank you for your email!", "reply_subject": "Re: Test Subject"},
+            {"reply_subject": "Re: Test Subject", "to": None, "cc": None, "bcc": None},
+            id="default_recipients"),
+        pytest.param(
+            {"reply_body": "Thank you for your email!", "to": ["custom@example.com"],
+             "cc": ["cc@example.com"], "bcc": ["bcc@example.com"]},
+            {"reply_subject": "", "to": ["custom@example.com"], "cc": ["cc@example.com"], "bcc": ["bcc@example.com"]},
+            id="custom_recipients"),
+    ])
+    def test_reply_to_email_success(self, client_with_user, mock_inbox_google_service, reply_data, expected_call):
+        """Test successfully replying to an email, with and without custom recipients."""
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.send_email_reply.return_value = {"success": True}
 
-        email_id = "test_email_id"
-        reply_data = {
-            "reply_body": "Thank you for your email!",
-            "reply_subject": "Re: Test Subject"
-        }
-
-        response = client.post(f"/inbox/email/{email_id}/reply", json=reply_data)
+        response = client_with_user.post(_EMAIL_REPLY_URL, json=reply_data)
 
         assert response.status_code == 200
         data = response.json()
         assert "Successfully sent reply" in data["message"]
-        assert data["email_id"] == email_id
+        assert data["email_id"] == _EMAIL_ID
         
         mock_google_service.send_email_reply.assert_called_once_with(
-            original_email_id=email_id,
+            original_email_id=_EMAIL_ID,
             reply_body="Thank you for your email!",
-            reply_subject="Re: Test Subject",
-            to=None,
-            cc=None,
-            bcc=None
+            **expected_call
         )
 
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_reply_to_email_with_custom_recipients(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
-        """Test replying to email with custom recipients."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
-        mock_google_service.send_email_reply.return_value = {"success": True}
-
-        email_id = "test_email_id"
-        reply_data = {
-            "reply_body": "Thank you for your email!",
-            "to": ["custom@example.com"],
-            "cc": ["cc@example.com"],
-            "bcc": ["bcc@example.com"]
-        }
-
-        response = client.post(f"/inbox/email/{email_id}/reply", json=reply_data)
-
-        assert response.status_code == 200
-        
-        mock_google_service.send_email_reply.assert_called_once_with(
-            original_email_id=email_id,
-            reply_body="Thank you for your email!",
-            reply_subject="",
-            to=["custom@example.com"],
-            cc=["cc@example.com"],
-            bcc=["bcc@example.com"]
-        )
-
-    @patch('apis.inbox.get_current_user_profile')
-    @patch('apis.inbox.GoogleService')
-    def test_reply_to_email_failure(self, mock_google_service_class, mock_get_user, client, mock_user_profile):
+    def test_reply_to_email_failure(self, client_with_user, mock_inbox_google_service):
         """Test email reply failure."""
-        mock_get_user.return_value = mock_user_profile
-        mock_google_service = Mock()
-        mock_google_service_class.return_value = mock_google_service
+        mock_google_service = mock_inbox_google_service[0]
         mock_google_service.send_email_reply.return_value = {"error": "Failed to send email"}
 
-        email_id = "test_email_id"
         reply_data = {
             "reply_body": "Thank you for your email!"
         }
 
-        response = client.post(f"/inbox/email/{email_id}/reply", json=reply_data)
+        response = client_with_user.post(_EMAIL_REPLY_URL, json=reply_data)
 
         assert response.status_code == 400
         data = response.json()
@@ -350,8 +258,6 @@ class TestEmailReplyRequest:
 
     def test_valid_reply_request(self):
         """Test valid email reply request."""
-        from apis.inbox import EmailReplyRequest
-        
         request = EmailReplyRequest(
             reply_body="Thank you for your message!",
             reply_subject="Re: Test",
@@ -368,8 +274,6 @@ class TestEmailReplyRequest:
 
     def test_minimal_reply_request(self):
         """Test minimal email reply request with only required fields."""
-        from apis.inbox import EmailReplyRequest
-        
         request = EmailReplyRequest(reply_body="Thank you!")
         
         assert request.reply_body == "Thank you!"
@@ -380,8 +284,5 @@ class TestEmailReplyRequest:
 
     def test_reply_request_missing_body(self):
         """Test email reply request without body."""
-        from apis.inbox import EmailReplyRequest
-        from pydantic import ValidationError
-        
         with pytest.raises(ValidationError):
             EmailReplyRequest() 
\ No newline at end of file
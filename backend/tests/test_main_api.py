@@ -1,22 +1,37 @@
 """Tests for main API endpoints and general functionality."""
 
 import pytest
-from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+
+@pytest.fixture
+def stubbed_route_services(mock_inbox_google_service, mock_google_service, mock_slack_service,
+                           mock_slack_token_manager, mock_connections_service, mock_user_prompt_service):
+    """Give every router's GET endpoint an empty, successful service result."""
+    google_service = mock_inbox_google_service[0]
+    google_service.get_inbox_threads.return_value = []
+    google_service.get_token_info.return_value = {"authenticated": False}
+    mock_slack_service[0].get_valid_token.return_value = None
+    mock_slack_token_manager.test_token_validity.return_value = False
+    mock_connections_service.get_user_connections.return_value = []
+    mock_user_prompt_service.get_user_prompt_config.return_value = {}
 
 class TestMainAPI:
     """Test main API endpoints."""
 
-    def test_root_endpoint(self, client):
+    @pytest.mark.asyncio
+    async def test_root_endpoint(self, aclient):
         """Test root endpoint returns correct message."""
-        response = client.get("/")
+        response = await aclient.get("/")
         
         assert response.status_code == 200
         data = response.json()
         assert data["message"] == "Finance Inbox API is running"
 
-    def test_health_endpoint(self, client):
+    @pytest.mark.asyncio
+    async def test_health_endpoint(self, aclient):
         """Test health check endpoint."""
-        response = client.get("/health")
+        response = await aclient.get("/health")
         
         assert response.status_code == 200
         data = response.json()
@@ -44,43 +59,21 @@ class TestCORSConfiguration:
 class TestAPIStructure:
     """Test API structure and router inclusion."""
 
-    def test_auth_routes_included(self, client):
-        """Test that auth routes are accessible."""
-        # Test valid auth endpoint exists
-        response = client.get("/auth/health")
+    @pytest.mark.parametrize("path", [
+        "/auth/health",
+        "/inbox/",
+        "/google-auth/status",
+        "/slack-auth/status",
+        "/slack-api/test-connection",
+        "/settings/connections",
+        "/settings/prompt",
+    ])
+    @pytest.mark.asyncio
+    async def test_routes_included(self, aclient, stubbed_route_services, path):
+        """Test that each router's routes are accessible."""
+        response = await aclient.get(path)
         assert response.status_code == 200
 
-    def test_inbox_routes_included(self, client):
-        """Test that inbox routes are accessible."""
-        # Test inbox endpoint - with mocked auth, should work
-        response = client.get("/inbox/")
-        assert response.status_code in [200, 401, 422, 500]  # Any response except 404 means route exists
-
-    def test_gmail_auth_routes_included(self, client):
-        """Test that Gmail auth routes are accessible."""
-        response = client.get("/google-auth/status")
-        assert response.status_code in [200, 401, 422, 500]  # Any response except 404 means route exists
-
-    def test_slack_auth_routes_included(self, client):
-        """Test that Slack auth routes are accessible."""
-        response = client.get("/slack-auth/status")
-        assert response.status_code in [200, 401, 422, 500]  # Any response except 404 means route exists
-
-    def test_slack_api_routes_included(self, client):
-        """Test that Slack API routes are accessible."""
-        response = client.get("/slack-api/test-connection")
-        assert response.status_code in [200, 401, 422, 500]  # Any response except 404 means route exists
-
-    def test_settings_routes_included(self, client):
-        """Test that settings routes are accessible."""
-        response = client.get("/settings/connections")
-        assert response.status_code in [200, 401, 422, 500]  # Any response except 404 means route exists
-
-    def test_prompt_settings_routes_included(self, client):
-        """Test that prompt settings routes are accessible."""
-        response = client.get("/settings/prompt")
-        assert response.status_code in [200, 401, 422, 500]  # Any response except 404 means route exists
-
 class TestErrorHandling:
     """Test general error handling."""
 
@@ -116,15 +109,13 @@ class TestErrorHandling:
 class TestAppLifespan:
     """Test application lifespan events."""
 
-    @patch('main.email_polling_service')
-    @patch('main.asyncio.create_task')
-    def test_startup_polling_service(self, mock_create_task, mock_polling_service):
+    def test_startup_polling_service(self, mock_email_polling_service):
         """Test that email polling service starts on app startup."""
-        # Note: This test would require more complex setup to actually test the lifespan
-        # For now, we verify the imports and structure are correct
-        from main import app
-        assert app is not None
-        assert hasattr(app, 'router')
+        # The shared client never enters the lifespan; only this test runs it
+        with TestClient(app):
+            mock_email_polling_service.start_polling_all_users.assert_called_once_with()
+
+        mock_email_polling_service.stop.assert_called_once_with()
 
     def test_app_metadata(self, client):
         """Test app metadata is correctly set."""
@@ -136,24 +127,27 @@ class TestAppLifespan:
 class TestAPIDocumentation:
     """Test API documentation endpoints."""
 
-    def test_openapi_schema_available(self, client):
+    @pytest.mark.asyncio
+    async def test_openapi_schema_available(self, aclient):
         """Test that OpenAPI schema is available."""
-        response = client.get("/openapi.json")
+        response = await aclient.get("/openapi.json")
         assert response.status_code == 200
         data = response.json()
         assert "openapi" in data
         assert data["info"]["title"] == "Finance Inbox API"
         assert data["info"]["version"] == "1.0.0"
 
-    def test_docs_endpoint_available(self, client):
+    @pytest.mark.asyncio
+    async def test_docs_endpoint_available(self, aclient):
         """Test that Swagger docs endpoint is available."""
-        response = client.get("/docs")
+        response = await aclient.get("/docs")
         assert response.status_code == 200
         assert "text/html" in response.headers.get("content-type", "")
 
-    def test_redoc_endpoint_available(self, client):
+    @pytest.mark.asyncio
+    async def test_redoc_endpoint_available(self, aclient):
         """Test that ReDoc endpoint is available."""
-        response = client.get("/redoc")
+        response = await aclient.get("/redoc")
         assert response.status_code == 200
         assert "text/html" in response.headers.get("content-type", "")
 
@@ -167,8 +161,7 @@ class TestAPIValidation:
             "password": "password123"
         })
         assert response.status_code == 422
-        data = response.json()
-        assert "detail" in data
+        assert b'"detail"' in response.content
         # Should contain validation error for email field
 
     def test_required_fields_validation(self, client):
@@ -178,8 +171,7 @@ class TestAPIValidation:
             # Missing password
         })
         assert response.status_code == 422
-        data = response.json()
-        assert "detail" in data
+        assert b'"detail"' in response.content
 
     def test_extra_fields_handling(self, client):
         """Test handling of extra fields in requests."""
@@ -223,31 +215,24 @@ class TestRateLimiting:
 class TestResponseFormats:
     """Test consistent response formats across API."""
 
-    def test_json_responses_are_valid(self, client):
-        """Test that all JSON responses are valid JSON."""
-        endpoints = [
-            "/",
-            "/health",
-            "/auth/health"
-        ]
-        
-        for endpoint in endpoints:
-            response = client.get(endpoint)
-            if response.status_code == 200:
-                # Should be valid JSON
-                data = response.json()
-                assert isinstance(data, dict)
+    @pytest.mark.parametrize("endpoint", ["/", "/health", "/auth/health"])
+    @pytest.mark.asyncio
+    async def test_json_responses_are_valid(self, aclient, endpoint):
+        """Test that JSON responses are valid JSON."""
+        response = await aclient.get(endpoint)
+        assert response.status_code == 200
+        # Should be valid JSON
+        data = response.json()
+        assert isinstance(data, dict)
 
     def test_error_response_format(self, client):
         """Test that error responses follow consistent format."""
         # Test 404 error
         response = client.get("/non-existent")
         assert response.status_code == 404
-        data = response.json()
-        assert "detail" in data
+        assert b'"detail"' in response.content
 
         # Test validation error
         response = client.post("/auth/login", json={})
         assert response.status_code == 422
-        data = response.json()
-        assert "detail" in data 
\ No newline at end of file
+        assert b'"detail"' in response.content 
\ No newline at end of file
@@ -2,122 +2,109 @@
 
 import pytest
 from fastapi import HTTPException
-from unittest.mock import Mock, patch
-from tests.factories import generate_prompt_config
+from pydantic import ValidationError
+from apis.prompt_settings import PromptUpdateRequest, PromptValidationRequest
+
+_FULL_PROMPT_UPDATE = {
+    "template": "Categorize email: Subject: {subject}, From: {sender}, Content: {content}",
+    "model": "gpt-4",
+    "temperature": 0.2,
+    "max_tokens": 300,
+    "timeout": 15
+}
+_VALID_PROMPT_UPDATE = {"template": "Valid template: {subject}, {sender}, {content}"}
+_VALID_PROMPT_UPDATE_WITH_DEFAULTS = {
+    **_VALID_PROMPT_UPDATE,
+    "model": "gpt-3.5-turbo",
+    "temperature": 0.1,
+    "max_tokens": 200,
+    "timeout": 10
+}
+
+# Default template handed back by the mocked service in the reset tests
+_DEFAULT_TEMPLATE = "Default template: {subject}, {sender}, {content}"
+
+# Template that will generate a preview long enough to be truncated
+_LONG_TEMPLATE = "Very long template: " + "Subject: {subject}, " * 100 + "From: {sender}, Content: {content}"
+
+@pytest.fixture
+def reset_prompt_service(mock_user_prompt_service):
+    """Mock user prompt service with the default template wired up for the reset endpoint."""
+    mock_user_prompt_service.get_default_prompt_template.return_value = _DEFAULT_TEMPLATE
+    return mock_user_prompt_service
 
 class TestPromptSettingsAPI:
     """Test prompt settings API endpoints."""
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_get_user_prompt_success(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
+    def test_get_user_prompt_success(self, client_with_user, mock_user_profile, mock_user_prompt_service,
+                                     prompt_config):
         """Test successful retrieval of user prompt configuration."""
-        mock_get_user.return_value = mock_user_profile
-        mock_prompt_config = generate_prompt_config()
-        mock_user_prompt_service.get_user_prompt_config.return_value = mock_prompt_config
+        mock_user_prompt_service.get_user_prompt_config.return_value = prompt_config
 
-        response = client.get("/settings/prompt")
+        response = client_with_user.get("/settings/prompt")
 
         assert response.status_code == 200
         data = response.json()
         assert data["success"] is True
         assert "prompt" in data
-        assert data["prompt"]["template"] == mock_prompt_config["template"]
-        assert data["prompt"]["model"] == mock_prompt_config["model"]
+        assert data["prompt"]["template"] == prompt_config["template"]
+        assert data["prompt"]["model"] == prompt_config["model"]
         
         # Verify service was called correctly
         mock_user_prompt_service.get_user_prompt_config.assert_called_once_with(mock_user_profile["user_id"])
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_get_user_prompt_service_error(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
+    def test_get_user_prompt_service_error(self, client_with_user, mock_user_prompt_service):
         """Test get user prompt with service error."""
-        mock_get_user.return_value = mock_user_profile
         mock_user_prompt_service.get_user_prompt_config.side_effect = Exception("Database error")
 
-        response = client.get("/settings/prompt")
+        response = client_with_user.get("/settings/prompt")
 
         assert response.status_code == 500
         data = response.json()
         assert data["detail"] == "Database error"
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_update_user_prompt_success(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
-        """Test successful prompt configuration update."""
-        mock_get_user.return_value = mock_user_profile
-        mock_user_prompt_service.update_user_prompt.return_value = {"success": True, "message": "Updated successfully"}
-
-        prompt_data = {
-            "template": "Categorize email: Subject: {subject}, From: {sender}, Content: {content}",
-            "model": "gpt-4",
-            "temperature": 0.2,
-            "max_tokens": 300,
-            "timeout": 15
-        }
-
-        response = client.put("/settings/prompt", json=prompt_data)
-
-        assert response.status_code == 200
+    @pytest.mark.parametrize("payload,service_result,expected_status,expected_detail,expected_call", [
+        pytest.param(_FULL_PROMPT_UPDATE, {"success": True, "message": "Updated successfully"},
+                     200, None, _FULL_PROMPT_UPDATE, id="success"),
+        pytest.param({"template": "Categorize: {subject}, {sender}, {content}"}, {"success": True},
+                     200, None, {"template": "Categorize: {subject}, {sender}, {content}", "model": "gpt-3.5-turbo",
+                                 "temperature": 0.1, "max_tokens": 200, "timeout": 10}, id="with_defaults"),
+        pytest.param({"template": "This template is missing required variables"}, None,
+                     400, "Template must contain these variables: ['{subject}', '{sender}', '{content}']", None,
+                     id="missing_required_variables"),
+        pytest.param({"template": "Subject: {subject}, Content: {content}"}, None,  # Missing {sender}
+                     400, "Template must contain these variables: ['{sender}']", None,
+                     id="missing_some_variables"),
+        pytest.param(_VALID_PROMPT_UPDATE, {"success": False, "error": "Failed to update prompt"},
+                     500, "Failed to update prompt", _VALID_PROMPT_UPDATE_WITH_DEFAULTS, id="service_failure"),
+        pytest.param(_VALID_PROMPT_UPDATE, Exception("Database connection failed"),
+                     500, "Database connection failed", _VALID_PROMPT_UPDATE_WITH_DEFAULTS, id="service_exception"),
+    ])
+    def test_update_user_prompt(self, client_with_user, mock_user_profile, mock_user_prompt_service,
+                                payload, service_result, expected_status, expected_detail, expected_call):
+        """Test prompt configuration updates, template validation and service errors."""
+        if isinstance(service_result, Exception):
+            mock_user_prompt_service.update_user_prompt.side_effect = service_result
+        else:
+            mock_user_prompt_service.update_user_prompt.return_value = service_result
+
+        response = client_with_user.put("/settings/prompt", json=payload)
+
+        assert response.status_code == expected_status
         data = response.json()
-        assert data["success"] is True
-        
-        # Verify service was called with correct data
-        mock_user_prompt_service.update_user_prompt.assert_called_once_with(
-            mock_user_profile["user_id"], 
-            prompt_data
-        )
-
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_update_user_prompt_with_defaults(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
-        """Test prompt update with default values."""
-        mock_get_user.return_value = mock_user_profile
-        mock_user_prompt_service.update_user_prompt.return_value = {"success": True}
-
-        # Only provide required template field
-        prompt_data = {
-            "template": "Categorize: {subject}, {sender}, {content}"
-        }
-
-        response = client.put("/settings/prompt", json=prompt_data)
-
-        assert response.status_code == 200
-        
-        # Verify default values were used
-        call_args = mock_user_prompt_service.update_user_prompt.call_args[0][1]
-        assert call_args["model"] == "gpt-3.5-turbo"
-        assert call_args["temperature"] == 0.1
-        assert call_args["max_tokens"] == 200
-        assert call_args["timeout"] == 10
-
-    def test_update_user_prompt_missing_required_variables(self, client):
-        """Test prompt update with missing required variables."""
-        prompt_data = {
-            "template": "This template is missing required variables"
-        }
-
-        response = client.put("/settings/prompt", json=prompt_data)
-
-        assert response.status_code == 400
-        data = response.json()
-        assert "Template must contain these variables" in data["detail"]
-        assert "{subject}" in data["detail"]
-        assert "{sender}" in data["detail"]
-        assert "{content}" in data["detail"]
-
-    def test_update_user_prompt_missing_some_variables(self, client):
-        """Test prompt update with some missing required variables."""
-        prompt_data = {
-            "template": "Subject: {subject}, Content: {content}"  # Missing {sender}
-        }
-
-        response = client.put("/settings/prompt", json=prompt_data)
-
-        assert response.status_code == 400
-        data = response.json()
-        assert "Template must contain these variables" in data["detail"]
-        assert "{sender}" in data["detail"]
+        if expected_detail is None:
+            assert data["success"] is True
+        else:
+            assert data["detail"] == expected_detail
+
+        # Templates missing variables are rejected before the service is called
+        if expected_call is None:
+            mock_user_prompt_service.update_user_prompt.assert_not_called()
+        else:
+            mock_user_prompt_service.update_user_prompt.assert_called_once_with(
+                mock_user_profile["user_id"],
+                expected_call
+            )
 
     def test_update_user_prompt_missing_template(self, client):
         """Test prompt update without template."""
@@ -127,52 +114,11 @@ class TestPromptSettingsAPI:
 
         assert response.status_code == 422
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_update_user_prompt_service_failure(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
-        """Test prompt update with service failure."""
-        mock_get_user.return_value = mock_user_profile
-        mock_user_prompt_service.update_user_prompt.return_value = {
-            "success": False, 
-            "error": "Failed to update prompt"
-        }
-
-        prompt_data = {
-            "template": "Valid template: {subject}, {sender}, {content}"
-        }
-
-        response = client.put("/settings/prompt", json=prompt_data)
-
-        assert response.status_code == 500
-        data = response.json()
-        assert data["detail"] == "Failed to update prompt"
-
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_update_user_prompt_service_exception(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
-        """Test prompt update with service exception."""
-        mock_get_user.return_value = mock_user_profile
-        mock_user_prompt_service.update_user_prompt.side_effect = Exception("Database connection failed")
-
-        prompt_data = {
-            "template": "Valid template: {subject}, {sender}, {content}"
-        }
-
-        response = client.put("/settings/prompt", json=prompt_data)
-
-        assert response.status_code == 500
-        data = response.json()
-        assert data["detail"] == "Database connection failed"
-
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_reset_user_prompt_success(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
+    def test_reset_user_prompt_success(self, client_with_user, mock_user_profile, reset_prompt_service):
         """Test successful prompt reset to default."""
-        mock_get_user.return_value = mock_user_profile
-        mock_user_prompt_service.get_default_prompt_template.return_value = "Default template: {subject}, {sender}, {content}"
-        mock_user_prompt_service.update_user_prompt.return_value = {"success": True}
+        reset_prompt_service.update_user_prompt.return_value = {"success": True}
 
-        response = client.post("/settings/prompt/reset")
+        response = client_with_user.post("/settings/prompt/reset")
 
         assert response.status_code == 200
         data = response.json()
@@ -180,59 +126,50 @@ class TestPromptSettingsAPI:
         assert data["message"] == "Prompt reset to default successfully"
         
         # Verify services were called correctly
-        mock_user_prompt_service.get_default_prompt_template.assert_called_once()
+        reset_prompt_service.get_default_prompt_template.assert_called_once()
         expected_reset_data = {
             'model': 'gpt-3.5-turbo',
             'temperature': 0.1,
             'max_tokens': 200,
             'timeout': 10,
-            'template': "Default template: {subject}, {sender}, {content}"
+            'template': _DEFAULT_TEMPLATE
         }
-        mock_user_prompt_service.update_user_prompt.assert_called_once_with(
+        reset_prompt_service.update_user_prompt.assert_called_once_with(
             mock_user_profile["user_id"], 
             expected_reset_data
         )
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_reset_user_prompt_service_failure(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
+    def test_reset_user_prompt_service_failure(self, client_with_user, reset_prompt_service):
         """Test prompt reset with service failure."""
-        mock_get_user.return_value = mock_user_profile
-        mock_user_prompt_service.get_default_prompt_template.return_value = "Default template: {subject}, {sender}, {content}"
-        mock_user_prompt_service.update_user_prompt.return_value = {
+        reset_prompt_service.update_user_prompt.return_value = {
             "success": False, 
             "error": "Reset failed"
         }
 
-        response = client.post("/settings/prompt/reset")
+        response = client_with_user.post("/settings/prompt/reset")
 
         assert response.status_code == 500
         data = response.json()
         assert data["detail"] == "Reset failed"
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    @patch('apis.prompt_settings.user_prompt_service')
-    def test_reset_user_prompt_exception(self, mock_user_prompt_service, mock_get_user, client, mock_user_profile):
+    def test_reset_user_prompt_exception(self, client_with_user, mock_user_prompt_service):
         """Test prompt reset with exception."""
-        mock_get_user.return_value = mock_user_profile
         mock_user_prompt_service.get_default_prompt_template.side_effect = Exception("Failed to get default template")
 
-        response = client.post("/settings/prompt/reset")
+        response = client_with_user.post("/settings/prompt/reset")
 
         assert response.status_code == 500
         data = response.json()
         assert data["detail"] == "Failed to get default template"
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    def test_validate_user_prompt_success(self, mock_get_user, client, mock_user_profile):
+    def test_validate_user_prompt_success(self, client_with_user):
         """Test successful prompt validation."""
-        mock_get_user.return_value = mock_user_profile
 
         validation_data = {
             "template": "Valid template: Subject: {subject}, From: {sender}, Content: {content}"
         }
 
-        response = client.post("/settings/prompt/validate", json=validation_data)
+        response = client_with_user.post("/settings/prompt/validate", json=validation_data)
 
         assert response.status_code == 200
         data = response.json()
@@ -243,16 +180,14 @@ class TestPromptSettingsAPI:
         assert "Test Sender" in data["preview"]
         assert "Test Content" in data["preview"]
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    def test_validate_user_prompt_missing_variables(self, mock_get_user, client, mock_user_profile):
+    def test_validate_user_prompt_missing_variables(self, client_with_user):
         """Test prompt validation with missing required variables."""
-        mock_get_user.return_value = mock_user_profile
 
         validation_data = {
             "template": "Invalid template missing variables"
         }
 
-        response = client.post("/settings/prompt/validate", json=validation_data)
+        response = client_with_user.post("/settings/prompt/validate", json=validation_data)
 
         assert response.status_code == 400
         data = response.json()
@@ -262,20 +197,17 @@ class TestPromptSettingsAPI:
         assert "{sender}" in data["detail"]["missing_variables"]
         assert "{content}" in data["detail"]["missing_variables"]
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    def test_validate_user_prompt_format_error(self, mock_get_user, client, mock_user_profile):
+    def test_validate_user_prompt_format_error(self, client_with_user):
         """Test prompt validation with template formatting error."""
-        mock_get_user.return_value = mock_user_profile
 
         validation_data = {
             "template": "Invalid template: {subject}, {sender}, {content}, {invalid_placeholder"  # Missing closing brace
         }
 
-        response = client.post("/settings/prompt/validate", json=validation_data)
+        response = client_with_user.post("/settings/prompt/validate", json=validation_data)
 
         assert response.status_code == 400
-        data = response.json()
-        assert "Template formatting error" in data["detail"]
+        assert b"Template formatting error" in response.content
 
     def test_validate_user_prompt_missing_template(self, client):
         """Test prompt validation without template."""
@@ -283,19 +215,14 @@ class TestPromptSettingsAPI:
 
         assert response.status_code == 422
 
-    @patch('apis.prompt_settings.get_current_user_profile')
-    def test_validate_user_prompt_long_preview(self, mock_get_user, client, mock_user_profile):
+    def test_validate_user_prompt_long_preview(self, client_with_user):
         """Test prompt validation with long preview that gets truncated."""
-        mock_get_user.return_value = mock_user_profile
 
-        # Create a template that will generate a long preview
-        long_template = "Very long template: " + "Subject: {subject}, " * 100 + "From: {sender}, Content: {content}"
-        
         validation_data = {
-            "template": long_template
+            "template": _LONG_TEMPLATE
         }
 
-        response = client.post("/settings/prompt/validate", json=validation_data)
+        response = client_with_user.post("/settings/prompt/validate", json=validation_data)
 
         assert response.status_code == 200
         data = response.json()
@@ -308,8 +235,6 @@ class TestPromptRequestModels:
 
     def test_prompt_update_request_valid(self):
         """Test valid prompt update request."""
-        from apis.prompt_settings import PromptUpdateRequest
-        
         request = PromptUpdateRequest(
             template="Test template: {subject}, {sender}, {content}",
             model="gpt-4",
@@ -326,8 +251,6 @@ class TestPromptRequestModels:
 
     def test_prompt_update_request_defaults(self):
         """Test prompt update request with default values."""
-        from apis.prompt_settings import PromptUpdateRequest
-        
         request = PromptUpdateRequest(
             template="Test template: {subject}, {sender}, {content}"
         )
@@ -340,8 +263,6 @@ class TestPromptRequestModels:
 
     def test_prompt_validation_request_valid(self):
         """Test valid prompt validation request."""
-        from apis.prompt_settings import PromptValidationRequest
-        
         request = PromptValidationRequest(
             template="Test template: {subject}, {sender}, {content}"
         )
@@ -350,27 +271,24 @@ class TestPromptRequestModels:
 
     def test_prompt_validation_request_missing_template(self):
         """Test prompt validation request without template."""
-        from apis.prompt_settings import PromptValidationRequest
-        from pydantic import ValidationError
-        
         with pytest.raises(ValidationError):
             PromptValidationRequest()
 
 class TestPromptSettingsAPIEdgeCases:
     """Test edge cases and error scenarios for prompt settings API."""
 
-    def test_unauthorized_access(self, unauthenticated_client):
+    @pytest.mark.parametrize("method, path, body", [
+        ("get", "/settings/prompt", None),
+        ("put", "/settings/prompt", {"template": "test"}),
+        ("post", "/settings/prompt/reset", None),
+        ("post", "/settings/prompt/validate", {"template": "test"}),
+    ])
+    def test_unauthorized_access(self, unauthenticated_client, method, path, body):
         """Test unauthorized access to prompt settings endpoints."""
-        response = unauthenticated_client.get("/settings/prompt")
-        assert response.status_code == 403  # FastAPI returns 403 for missing dependencies
-
-        response = unauthenticated_client.put("/settings/prompt", json={"template": "test"})
-        assert response.status_code == 403
-
-        response = unauthenticated_client.post("/settings/prompt/reset")
-        assert response.status_code == 403
+        request = getattr(unauthenticated_client, method)
+        response = request(path, json=body) if body else request(path)
 
-        response = unauthenticated_client.post("/settings/prompt/validate", json={"template": "test"})
+        # FastAPI returns 403 for missing dependencies
         assert response.status_code == 403
 
     def test_invalid_json_payloads(self, client):
@@ -381,19 +299,18 @@ class TestPromptSettingsAPIEdgeCases:
                             headers={"Content-Type": "application/json"})
         assert response.status_code == 422
 
-    def test_prompt_validation_edge_cases(self, client, mock_user_profile):
+    def test_prompt_validation_edge_cases(self, client_with_user):
         """Test prompt validation edge cases."""
-        with patch('apis.prompt_settings.get_current_user_profile', return_value=mock_user_profile):
-            # Test with empty template
-            response = client.post("/settings/prompt/validate", json={"template": ""})
-            assert response.status_code == 400
-
-            # Test with whitespace-only template
-            response = client.post("/settings/prompt/validate", json={"template": "   "})
-            assert response.status_code == 400
-
-            # Test with valid variables but extra text
-            response = client.post("/settings/prompt/validate", json={
-                "template": "Extra content {subject} more content {sender} final {content}"
-            })
-            assert response.status_code == 200 
\ No newline at end of file
+        # Test with empty template
+        response = client_with_user.post("/settings/prompt/validate", json={"template": ""})
+        assert response.status_code == 400
+
+        # Test with whitespace-only template
+        response = client_with_user.post("/settings/prompt/validate", json={"template": "   "})
+        assert response.status_code == 400
+
+        # Test with valid variables but extra text
+        response = client_with_user.post("/settings/prompt/validate", json={
+            "template": "Extra content {subject} more content {sender} final {content}"
+        })
+        assert response.status_code == 200
@@ -0,0 +1,8 @@
+"""Fixtures for pure model tests that never touch the FastAPI app."""
+
+import pytest
+
+@pytest.fixture(scope="session", autouse=True)
+def _test_env():
+    """No environment or poller patching needed for model-only tests."""
+    yield
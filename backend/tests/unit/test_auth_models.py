@@ -0,0 +1,60 @@
+"""Tests for authentication request/response models."""
+
+import pytest
+
+class TestLoginResponse:
+    """Test LoginResponse model."""
+
+    def test_from_user_auth_data(self, sample_user_auth_data):
+        """Test creating LoginResponse from UserAuthData."""
+        from apis.auth import LoginResponse
+        
+        response = LoginResponse.from_user_auth_data(sample_user_auth_data)
+        
+        assert response.access_token == sample_user_auth_data.access_token
+        assert response.refresh_token == sample_user_auth_data.refresh_token
+        assert response.token_type == sample_user_auth_data.token_type
+        assert response.expires_at == sample_user_auth_data.expires_at
+        assert response.user == sample_user_auth_data.user
+
+class TestRequestModels:
+    """Test request/response models validation."""
+
+    def test_login_request_valid(self):
+        """Test valid login request."""
+        from apis.auth import LoginRequest
+        
+        request = LoginRequest(
+            email="test@example.com",
+            password="password123"
+        )
+        
+        assert request.email == "test@example.com"
+        assert request.password == "password123"
+
+    def test_login_request_invalid_email(self):
+        """Test login request with invalid email."""
+        from apis.auth import LoginRequest
+        from pydantic import ValidationError
+        
+        with pytest.raises(ValidationError):
+            LoginRequest(
+                email="invalid-email",
+                password="password123"
+            )
+
+    def test_refresh_token_request_valid(self):
+        """Test valid refresh token request."""
+        from apis.auth import RefreshTokenRequest
+        
+        request = RefreshTokenRequest(refresh_token="valid_token")
+        
+        assert request.refresh_token == "valid_token"
+
+    def test_refresh_token_request_missing_token(self):
+        """Test refresh token request with missing token."""
+        from apis.auth import RefreshTokenRequest
+        from pydantic import ValidationError
+        
+        with pytest.raises(ValidationError):
+            RefreshTokenRequest() 
\ No newline at end of file